@@ -0,0 +1,91 @@
+"""
+Benchmark of reading SART output files for batch analysis.
+
+Writes an archive of simulated sessions (see sart_simulation.py) as SART_<n>.xlsx
+files in a temporary folder, then measures:
+
+- the time to read a single file with sart_analysis.read_analysis_columns
+- the time to read the whole archive with sart_analysis.read_archive
+- the time to compute the summary measures with sart_analysis.compute_metrics
+
+Usage:
+
+    python benchmarks/bench_analysis.py --files 50 --blocks 2 --reps 5 --output analysis_times.json
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import sart_analysis
+import sart_simulation
+
+
+def write_archive(folder:pathlib.Path, n_files:int, blocks:int, reps:int) -> list[pathlib.Path]:
+    """
+    Writes n_files simulated sessions to the folder as SART_<n>.xlsx files.
+    """
+
+    results_df = sart_simulation.simulate_sessions(n_files, sart_simulation.SimulatedParticipant(), seed=0, processes=1,
+                                                   blocks=blocks, reps=reps)
+    paths = []
+    for participant_number, session_df in results_df.groupby('participant_number'):
+        path = folder / f"SART_{participant_number}.xlsx"
+        session_df.to_excel(path, freeze_panes=(1, 0), index=False)
+        paths.append(path)
+    return paths
+
+
+def run(n_files:int=50, blocks:int=2, reps:int=5, processes:int|None=None) -> dict:
+    """
+    Runs the benchmark and returns the timings in seconds.
+    """
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = write_archive(pathlib.Path(folder), n_files, blocks, reps)
+        file_secs = [sart_analysis.read_analysis_columns(path)[1] for path in paths]
+
+        start_time = time.perf_counter()
+        results_df, _ = sart_analysis.read_archive(paths, processes=processes)
+        archive_secs = time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        sart_analysis.compute_metrics(results_df)
+        metrics_secs = time.perf_counter() - start_time
+
+    return {
+        'files': n_files,
+        'trials_per_file': 45 * blocks * reps,
+        'read_file_secs': {'mean': statistics.mean(file_secs), 'median': statistics.median(file_secs), 'max': max(file_secs)},
+        'read_archive_secs': archive_secs,
+        'compute_metrics_secs': metrics_secs,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark reading an archive of SART output files.")
+    parser.add_argument('--files', type=int, default=50)
+    parser.add_argument('--blocks', type=int, default=2)
+    parser.add_argument('--reps', type=int, default=5)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.files, args.blocks, args.reps, args.processes)
+    print(f"Read one file ({results['trials_per_file']} trials): {results['read_file_secs']['median']*1000:.1f} ms (median), "
+          f"{results['read_file_secs']['max']*1000:.1f} ms (max)")
+    print(f"Read archive of {results['files']} files: {results['read_archive_secs']:.2f}s")
+    print(f"Compute metrics: {results['compute_metrics_secs']*1000:.1f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Benchmark suite for the SART hot paths.
+
+Measures:
+
+- trial list generation (SessionPlan.block_trials, which create_trial_list() and the
+  session plan use), in random and fixed order, for small and huge numbers of reps
+- create_trial_list() itself (only if PsychoPy is installed)
+- recording trials (SART.record_trial, i.e. update_result() plus the last_four_avg
+  calculation), with and without the background trial log writer
+- the save_and_quit() export (build_results_dataframe() and write_results(), or the
+  streamed write_xlsx() for xlsx) for large sessions
+- a full block() against a small non-fullscreen window that does not wait for the
+  screen refresh (only if PsychoPy is installed and a window can be opened, e.g. under xvfb)
+
+Each result is the best of several repeats. The results are written as JSON so that runs
+can be compared; with --baseline, the run fails (exit code 1) if any benchmark is slower
+than in the baseline file by more than --tolerance.
+
+Usage:
+
+    python benchmarks/bench_hot_paths.py --output hot_paths.json
+    python benchmarks/bench_hot_paths.py --baseline hot_paths.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import python_sart
+
+
+def best_time(function, repeats:int) -> float:
+    """
+    Calls function repeats times and returns the shortest time taken, in seconds.
+    """
+
+    times = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start_time)
+    return min(times)
+
+
+def result(name:str, secs:float, items:int, item:str) -> dict:
+    return {'name': name, 'secs': secs, 'items': items, 'item': item, 'per_item_us': secs / items * 1e6}
+
+
+def bench_trial_lists(repeats:int) -> list[dict]:
+    results = []
+    for fixed_order in [False, True]:
+        for reps in [5, 1000]:
+            order = 'fixed' if fixed_order else 'random'
+            secs = best_time(lambda: python_sart.SessionPlan.block_trials(random.Random(0), reps, fixed_order), repeats)
+            results.append(result(f"block_trials[{order},reps={reps}]", secs, 45 * reps, 'trial'))
+    return results
+
+
+def bench_create_trial_list(repeats:int) -> list[dict]:
+    try:
+        import psychopy.data
+    except ImportError:
+        print("Skipping create_trial_list: PsychoPy is not installed")
+        return []
+    results = []
+    for fixed_order in [False, True]:
+        for reps in [5, 1000]:
+            sart = python_sart.SART(reps=reps, omit_number=3, fixed_order=fixed_order)
+            order = 'fixed' if fixed_order else 'random'
+            secs = best_time(lambda: list(sart.create_trial_list()), repeats)
+            results.append(result(f"create_trial_list[{order},reps={reps}]", secs, 45 * reps, 'trial'))
+    return results
+
+
+def record_trials(sart:python_sart.SART, trials:list) -> None:
+    for trial_number, trial in enumerate(trials):
+        number = trial['number']
+        should_press = number != sart.omit_number
+        keys_pressed = [('space', 0.35)] if should_press else []
+        response_time, correct_response = sart.score_response(number, keys_pressed)
+        sart.record_trial(1, trial_number + 1, number, response_time, correct_response)
+
+
+def bench_record_trial(repeats:int, blocks:int=20, reps:int=5) -> list[dict]:
+    results = []
+    n_trials = 45 * reps * blocks
+
+    def run_without_log():
+        sart = python_sart.SART(blocks=blocks, reps=reps, omit_number=3, seed=0)
+        record_trials(sart, [trial for block in sart.plan.blocks for trial in block])
+
+    results.append(result("record_trial", best_time(run_without_log, repeats), n_trials, 'trial'))
+
+    with tempfile.TemporaryDirectory() as folder:
+        writers = []
+
+        def run_with_log():
+            #As in SART.open_trial_log(), trials are queued for the background writer; only the time on the trial thread is measured
+            sart = python_sart.SART(blocks=blocks, reps=reps, omit_number=3, seed=0)
+            sart.trial_log = python_sart.TrialLog(pathlib.Path(folder) / f"bench{len(writers)}.log.csv", sart.columns)
+            sart.writer = python_sart.BackgroundWriter(sart.trial_log, max_queue_size=sart.writer_queue_size)
+            writers.append(sart.writer)
+            record_trials(sart, [trial for block in sart.plan.blocks for trial in block])
+
+        results.append(result("record_trial[with_log]", best_time(run_with_log, repeats), n_trials, 'trial'))
+        for writer in writers:
+            writer.close()
+    return results
+
+
+def bench_export(repeats:int, block_counts:list=[10, 100], reps:int=5) -> list[dict]:
+    results = []
+    for blocks in block_counts:
+        sart = python_sart.SART(blocks=blocks, reps=reps, omit_number=3, seed=0)
+        sart.participant = python_sart.Participant(number=1, gender="Other", age=20, year_of_study="N/A",
+                                                   normal_vision="Yes", researcher_initials="BM")
+        record_trials(sart, [trial for block in sart.plan.blocks for trial in block])
+        n_trials = len(sart.results)
+        results.append(result(f"build_results_dataframe[blocks={blocks}]", best_time(sart.build_results_dataframe, repeats), n_trials, 'trial'))
+        results_df = sart.build_results_dataframe()
+        for output_format in python_sart.OUTPUT_FORMATS:
+            try:
+                python_sart.check_output_format(output_format)
+            except ImportError:
+                continue
+            with tempfile.TemporaryDirectory() as folder:
+                path = pathlib.Path(folder) / f"SART_1{python_sart.OUTPUT_FORMATS[output_format]['suffix']}"
+                if output_format == 'xlsx':
+                    #save_and_quit() streams xlsx files from the results buffer instead of using write_results()
+                    secs = best_time(lambda: python_sart.write_xlsx(sart.results, path, sart.session_table()), 1)
+                    name = f"write_xlsx[blocks={blocks}]"
+                else:
+                    secs = best_time(lambda: python_sart.write_results(results_df, path, output_format), repeats)
+                    name = f"write_results[{output_format},blocks={blocks}]"
+            results.append(result(name, secs, n_trials, 'trial'))
+    return results
+
+
+def bench_block(reps:int=1) -> list[dict]:
+    try:
+        from psychopy import visual
+        window = visual.Window(size=(800, 600), fullscr=False, color="black", units='cm', monitor="testMonitor", waitBlanking=False)
+    except Exception as e:
+        print(f"Skipping block: could not open a window ({e})")
+        return []
+    try:
+        sart = python_sart.SART(blocks=1, reps=reps, omit_number=3, show_practice=False, show_countdown=False,
+                                stimulus_visible_secs=0.0, stimulus_masked_secs=0.0, seed=0)
+        sart.window = window
+        sart.open_response_backend()
+        first_block_secs = best_time(lambda: sart.block(block_number=1), 1)
+        sart.results = python_sart.ResultsBuffer(45 * reps, sart.omit_number)
+        secs = best_time(lambda: sart.block(block_number=1), 1)
+    finally:
+        window.close()
+    return [result("block[first,no_waits]", first_block_secs, 45 * reps, 'trial'),
+            result("block[no_waits]", secs, 45 * reps, 'trial')]
+
+
+def run(repeats:int=5) -> dict:
+    """
+    Runs every benchmark and returns the results with some information about the environment.
+    """
+
+    results = []
+    results += bench_trial_lists(repeats)
+    results += bench_create_trial_list(repeats)
+    results += bench_record_trial(repeats)
+    results += bench_export(repeats)
+    results += bench_block()
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeats': repeats,
+        'results': results,
+    }
+
+
+def compare(results:dict, baseline:dict, tolerance:float) -> list[str]:
+    """
+    Returns a description of each benchmark that is slower than in the baseline by more than the tolerance (a fraction).
+    """
+
+    baseline_secs = {item['name']: item['per_item_us'] for item in baseline['results']}
+    regressions = []
+    for item in results['results']:
+        before = baseline_secs.get(item['name'])
+        if before is not None and item['per_item_us'] > before * (1 + tolerance):
+            regressions.append(f"{item['name']}: {before:.2f} -> {item['per_item_us']:.2f} us per {item['item']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SART hot paths.")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', default=None, help="Compare against the results in this JSON file.")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown against the baseline (default 0.25, i.e. 25%%).")
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+    for item in results['results']:
+        print(f"{item['name']:<45} {item['secs']*1000:>10.2f} ms {item['per_item_us']:>10.2f} us per {item['item']}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        if regressions:
+            print("Slower than the baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
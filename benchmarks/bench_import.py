@@ -0,0 +1,87 @@
+"""
+Benchmark of the cold-start cost of python_sart.
+
+Each measurement runs in a fresh Python interpreter, so nothing is cached in
+sys.modules. The following are timed:
+
+- import python_sart
+- SART(...) construction (including the session plan and results buffer)
+
+and the heavy dependencies (PsychoPy, pandas, PyQt6) that have been loaded at
+that point are listed, since none of them should be needed until a window,
+dialog or export is used.
+
+Usage:
+
+    python benchmarks/bench_import.py --repeats 10 --output import_times.json
+"""
+
+import argparse
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ['psychopy', 'pandas', 'PyQt6']
+
+CHILD_SCRIPT = f"""
+import json, sys, time
+sys.path.insert(0, {str(REPO_DIR)!r})
+start_time = time.perf_counter()
+import python_sart
+import_secs = time.perf_counter() - start_time
+start_time = time.perf_counter()
+python_sart.SART(blocks=4, reps=5, omit_number=3)
+construct_secs = time.perf_counter() - start_time
+print(json.dumps({{
+    'import_secs': import_secs,
+    'construct_secs': construct_secs,
+    'heavy_modules_loaded': [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_once() -> dict:
+    """
+    Runs the import and construction in a new interpreter and returns its measurements.
+    """
+
+    output = subprocess.run([sys.executable, '-c', CHILD_SCRIPT], check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeats:int=10) -> dict:
+    """
+    Measures the cold-start times repeats times.
+    Returns:
+    dict: The median and maximum of each time in seconds, and the heavy modules loaded after construction.
+    """
+
+    runs = [measure_once() for _ in range(repeats)]
+    results = {'repeats': repeats}
+    for key in ['import_secs', 'construct_secs']:
+        values = [run[key] for run in runs]
+        results[key] = {'median': statistics.median(values), 'max': max(values)}
+    results['heavy_modules_loaded'] = runs[-1]['heavy_modules_loaded']
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the cold-start time of python_sart.")
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.repeats)
+    print(f"import python_sart: {results['import_secs']['median']*1000:.1f} ms (median), {results['import_secs']['max']*1000:.1f} ms (max)")
+    print(f"SART(...):          {results['construct_secs']['median']*1000:.1f} ms (median), {results['construct_secs']['max']*1000:.1f} ms (max)")
+    print(f"Heavy modules loaded: {', '.join(results['heavy_modules_loaded']) or 'none'}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
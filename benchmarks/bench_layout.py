@@ -0,0 +1,102 @@
+"""
+Compares the wide and normalized output layouts (the output_layout parameter of SART).
+
+For sessions of 1, 10 and 100 blocks of 5 reps (simulated with sart_simulation.py), measures
+for each layout:
+
+- the memory used by the results DataFrame (pandas memory_usage with deep=True)
+- the file size in each output format (for the normalized layout, the trial table plus the
+  session file)
+- the time to read the file back in the wide layout with python_sart.read_results
+
+Formats whose package is not installed (e.g. pyarrow for parquet and feather) are skipped.
+
+Usage:
+
+    python benchmarks/bench_layout.py --output layout.json
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import python_sart
+import sart_simulation
+
+
+def simulated_session(blocks:int, reps:int) -> sart_simulation.SimulatedSART:
+    sart = sart_simulation.SimulatedSART(sart_simulation.SimulatedParticipant(), 1, seed=0, blocks=blocks, reps=reps, show_practice=False)
+    sart.run()
+    return sart
+
+
+def write_layout(sart:python_sart.SART, layout:str, output_format:str, folder:pathlib.Path) -> tuple[pathlib.Path, int]:
+    """
+    Writes the session in a layout, and returns the results file and the total size of the files written.
+    """
+
+    path = folder / f"{layout}{python_sart.OUTPUT_FORMATS[output_format]['suffix']}"
+    if layout == 'normalized':
+        python_sart.write_results(sart.results.to_dataframe(), path, output_format)
+        session_path = python_sart.write_session(path, sart.session_table())
+        return path, path.stat().st_size + session_path.stat().st_size
+    python_sart.write_results(sart.build_results_dataframe(), path, output_format)
+    return path, path.stat().st_size
+
+
+def run(block_counts:list=[1, 10, 100], reps:int=5, repeats:int=3) -> list[dict]:
+    """
+    Runs the benchmark and returns one result per session size, layout and format.
+    """
+
+    results = []
+    for blocks in block_counts:
+        sart = simulated_session(blocks, reps)
+        memory = {
+            'wide': int(sart.build_results_dataframe().memory_usage(deep=True).sum()),
+            'normalized': int(sart.results.to_dataframe().memory_usage(deep=True).sum()),
+        }
+        for output_format in python_sart.OUTPUT_FORMATS:
+            try:
+                python_sart.check_output_format(output_format)
+            except ImportError as e:
+                print(f"Skipping {output_format}: {e}")
+                continue
+            for layout in ['wide', 'normalized']:
+                with tempfile.TemporaryDirectory() as folder:
+                    path, file_bytes = write_layout(sart, layout, output_format, pathlib.Path(folder))
+                    read_secs = []
+                    for _ in range(repeats):
+                        start_time = time.perf_counter()
+                        python_sart.read_results(path, output_format)
+                        read_secs.append(time.perf_counter() - start_time)
+                results.append({'blocks': blocks, 'reps': reps, 'trials': len(sart.results), 'layout': layout, 'format': output_format,
+                                'memory_bytes': memory[layout], 'file_bytes': file_bytes, 'read_secs': min(read_secs)})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the memory use and file size of the wide and normalized output layouts.")
+    parser.add_argument('--blocks', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--reps', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.blocks, args.reps, args.repeats)
+    print(f"{'blocks':>6} {'trials':>7} {'format':>8} {'layout':>10} {'memory KB':>10} {'size KB':>9} {'read ms':>9}")
+    for result in results:
+        print(f"{result['blocks']:>6} {result['trials']:>7} {result['format']:>8} {result['layout']:>10} {result['memory_bytes']/1024:>10.1f} "
+              f"{result['file_bytes']/1024:>9.1f} {result['read_secs']*1000:>9.1f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
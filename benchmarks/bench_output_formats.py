@@ -0,0 +1,89 @@
+"""
+Benchmark of the output file formats supported by python_sart.write_results.
+
+For sessions of 1, 10 and 100 blocks of 5 reps (simulated with sart_simulation.py),
+each format is written and read back, measuring:
+
+- write time (python_sart.write_results)
+- read time (python_sart.read_results)
+- file size
+
+Formats whose package is not installed (e.g. pyarrow for parquet and feather) are skipped.
+
+Usage:
+
+    python benchmarks/bench_output_formats.py --output format_times.json
+"""
+
+import argparse
+import json
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import python_sart
+import sart_simulation
+
+
+def time_format(results_df, output_format:str, folder:pathlib.Path, repeats:int) -> dict:
+    """
+    Writes and reads the results in one format repeats times, and returns the best write and read times and the file size.
+    """
+
+    path = folder / f"results{python_sart.OUTPUT_FORMATS[output_format]['suffix']}"
+    write_secs = []
+    read_secs = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        python_sart.write_results(results_df, path, output_format)
+        write_secs.append(time.perf_counter() - start_time)
+        start_time = time.perf_counter()
+        python_sart.read_results(path, output_format)
+        read_secs.append(time.perf_counter() - start_time)
+    return {'write_secs': min(write_secs), 'read_secs': min(read_secs), 'file_bytes': path.stat().st_size}
+
+
+def run(block_counts:list=[1, 10, 100], reps:int=5, repeats:int=3) -> list[dict]:
+    """
+    Runs the benchmark and returns one result per session size and format.
+    """
+
+    results = []
+    for blocks in block_counts:
+        results_df = sart_simulation.simulate_session(sart_simulation.SimulatedParticipant(), 1, seed=0,
+                                                      blocks=blocks, reps=reps, show_practice=False)
+        for output_format in python_sart.OUTPUT_FORMATS:
+            try:
+                python_sart.check_output_format(output_format)
+            except ImportError as e:
+                print(f"Skipping {output_format}: {e}")
+                continue
+            with tempfile.TemporaryDirectory() as folder:
+                timing = time_format(results_df, output_format, pathlib.Path(folder), repeats)
+            results.append({'blocks': blocks, 'reps': reps, 'trials': len(results_df), 'format': output_format, **timing})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark writing and reading SART results in each output format.")
+    parser.add_argument('--blocks', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--reps', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.blocks, args.reps, args.repeats)
+    print(f"{'blocks':>6} {'trials':>7} {'format':>8} {'write ms':>9} {'read ms':>9} {'size KB':>9}")
+    for result in results:
+        print(f"{result['blocks']:>6} {result['trials']:>7} {result['format']:>8} {result['write_secs']*1000:>9.1f} "
+              f"{result['read_secs']*1000:>9.1f} {result['file_bytes']/1024:>9.1f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
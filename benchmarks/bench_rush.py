@@ -0,0 +1,131 @@
+"""
+Compares frame timing jitter with rush mode (RushMode) on and off.
+
+A frame loop runs at a fixed refresh rate, waiting for each frame deadline like a window
+flip would, while making the kind of short-lived, partly cyclic allocations that drawing
+stimuli and collecting responses make. The frames are grouped into trials (69 frames, a
+250 ms stimulus and 900 ms mask at 60 Hz), and with RushMode on, its garbage is collected
+between trials as block() does. The lateness of every frame (how long after its deadline
+the loop got there) is recorded in alternating runs with RushMode off and on (so that
+neither setting always runs first), and the mean, standard deviation, 99th percentile and
+maximum lateness over the runs of each setting are compared.
+
+Without PsychoPy, only the garbage collector part of rush mode is used (the priority is not raised).
+
+Usage:
+
+    python benchmarks/bench_rush.py --frames 3600 --refresh-rate 60 --runs 3
+    python benchmarks/bench_rush.py --cpu 0 --output rush.json
+"""
+
+import argparse
+import json
+import pathlib
+import platform
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import python_sart
+
+
+def make_garbage(n_objects:int) -> None:
+    """
+    Makes short-lived objects, a quarter of them in reference cycles so that only the garbage collector can free them.
+    """
+
+    for i in range(n_objects):
+        item = {'number': i, 'text': str(i), 'pos': [0.0, 0.0]}
+        if i % 4 == 0:
+            item['self'] = item
+
+
+def frame_loop(n_frames:int, frame_period:float, objects_per_frame:int, frames_per_trial:int=69, rush:python_sart.RushMode|None=None) -> np.ndarray:
+    """
+    Runs n_frames frames, spinning until each deadline. If rush is given, its between_trials() is called right after
+    the last frame of each trial. Returns the lateness of each frame in seconds.
+    """
+
+    lateness = np.empty(n_frames)
+    deadline = time.perf_counter() + frame_period
+    for i in range(n_frames):
+        if rush is not None and i % frames_per_trial == 0 and i > 0:
+            #Right after the last flip of a trial, as in block()
+            rush.between_trials()
+        make_garbage(objects_per_frame)
+        while time.perf_counter() < deadline:
+            pass
+        now = time.perf_counter()
+        lateness[i] = now - deadline
+        deadline = max(deadline + frame_period, now)
+    return lateness
+
+
+def summarise(lateness:np.ndarray) -> dict:
+    return {
+        'frames': len(lateness),
+        'mean_ms': float(lateness.mean() * 1000),
+        'sd_ms': float(lateness.std() * 1000),
+        'p99_ms': float(np.percentile(lateness, 99) * 1000),
+        'max_ms': float(lateness.max() * 1000),
+    }
+
+
+def run(n_frames:int=3600, refresh_rate:float=60.0, objects_per_frame:int=2000, cpu:int|None=None, runs:int=3) -> dict:
+    """
+    Runs the frame loop with rush mode off and on, alternating which goes first, and returns the lateness summary of each setting.
+    """
+
+    frame_period = 1 / refresh_rate
+    rush = python_sart.RushMode(cpu=cpu)
+    lateness = {'off': [], 'on': []}
+    for i in range(runs):
+        for mode in (['off', 'on'] if i % 2 == 0 else ['on', 'off']):
+            if mode == 'off':
+                lateness['off'].append(frame_loop(n_frames, frame_period, objects_per_frame))
+                continue
+            rush.enter()
+            try:
+                lateness['on'].append(frame_loop(n_frames, frame_period, objects_per_frame, rush=rush))
+            finally:
+                rush.exit()
+    results = {mode: summarise(np.concatenate(values)) for mode, values in lateness.items()}
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'refresh_rate': refresh_rate,
+        'objects_per_frame': objects_per_frame,
+        'cpu': cpu,
+        'runs': runs,
+        'results': results,
+        'rush_stats': rush.stats,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare frame timing jitter with rush mode on and off.")
+    parser.add_argument('--frames', type=int, default=3600, help="Frames per run (default 3600, one minute at 60 Hz).")
+    parser.add_argument('--refresh-rate', type=float, default=60.0)
+    parser.add_argument('--objects-per-frame', type=int, default=2000, help="Objects allocated each frame.")
+    parser.add_argument('--cpu', type=int, default=None, help="Pin the process to this CPU while rush mode is on.")
+    parser.add_argument('--runs', type=int, default=3, help="Runs of each setting, alternating which goes first (default 3).")
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.frames, args.refresh_rate, args.objects_per_frame, args.cpu, args.runs)
+    for mode in ['off', 'on']:
+        item = results['results'][mode]
+        print(f"rush {mode:<3} mean {item['mean_ms']:.3f} ms, SD {item['sd_ms']:.3f} ms, "
+              f"p99 {item['p99_ms']:.3f} ms, max {item['max_ms']:.3f} ms late over {item['frames']} frames")
+    off, on = results['results']['off'], results['results']['on']
+    print(f"Difference (on - off): SD {on['sd_ms'] - off['sd_ms']:+.3f} ms, max {on['max_ms'] - off['max_ms']:+.3f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Compares the streaming xlsx writer (python_sart.write_xlsx) with writing the results DataFrame
+with DataFrame.to_excel, which is how save_and_quit() wrote xlsx files before.
+
+For sessions of 10, 100 and 400 blocks of 5 reps (simulated with sart_simulation.py), each
+writer is run in a fresh process, measuring:
+
+- wall time, including building the results DataFrame for to_excel
+- the increase in peak resident memory (RSS) of the process while writing (only on systems
+  with the resource module, e.g. Linux and macOS)
+
+Usage:
+
+    python benchmarks/bench_xlsx.py --output xlsx_times.json
+"""
+
+import argparse
+import concurrent.futures
+import gc
+import json
+import multiprocessing
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+import python_sart
+import sart_simulation
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+WRITERS = ['to_excel', 'streamed']
+
+
+def peak_rss_bytes() -> int|None:
+    if resource is None:
+        return None
+    #ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+def write(writer:str, trials:dict, session:dict, path:str) -> None:
+    if writer == 'streamed':
+        python_sart.write_xlsx(trials, path, session)
+    else:
+        python_sart.wide_results(trials, session).to_excel(path, freeze_panes=(1, 0), index=False)
+
+
+def time_writer(writer:str, trials:dict, session:dict, path:str) -> dict:
+    """
+    Writes the results with one writer, and returns the wall time and memory used. Run in a fresh process, so that
+    the peak RSS is not left over from an earlier run.
+    """
+
+    #A few rows are written first, so that importing pandas and openpyxl is not counted
+    write(writer, {col: values[:10] for col, values in trials.items()}, session, path)
+    gc.collect()
+    start_rss = peak_rss_bytes()
+    start_time = time.perf_counter()
+    write(writer, trials, session, path)
+    wall_secs = time.perf_counter() - start_time
+    end_rss = peak_rss_bytes()
+    return {'wall_secs': wall_secs, 'peak_rss_increase_bytes': None if start_rss is None else end_rss - start_rss,
+            'file_bytes': pathlib.Path(path).stat().st_size}
+
+
+def run(block_counts:list=[10, 100, 400], reps:int=5) -> list[dict]:
+    """
+    Runs the benchmark and returns one result per session size and writer.
+    """
+
+    python_sart.check_output_format('xlsx')
+    results = []
+    for blocks in block_counts:
+        sart = sart_simulation.SimulatedSART(sart_simulation.SimulatedParticipant(), 1, seed=0, blocks=blocks, reps=reps, show_practice=False)
+        sart.run()
+        trials = {col: values.copy() for col, values in sart.results.to_numpy().items()}
+        session = sart.session_table()
+        for writer in WRITERS:
+            with tempfile.TemporaryDirectory() as folder, \
+                    concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+                timing = pool.submit(time_writer, writer, trials, session, str(pathlib.Path(folder) / "results.xlsx")).result()
+            results.append({'blocks': blocks, 'reps': reps, 'trials': len(sart.results), 'writer': writer, **timing})
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the streaming xlsx writer with DataFrame.to_excel.")
+    parser.add_argument('--blocks', type=int, nargs='+', default=[10, 100, 400])
+    parser.add_argument('--reps', type=int, default=5)
+    parser.add_argument('--output', default=None, help="Write the results to this JSON file.")
+    args = parser.parse_args()
+
+    results = run(args.blocks, args.reps)
+    print(f"{'blocks':>6} {'trials':>7} {'writer':>9} {'wall ms':>9} {'peak RSS +KB':>13} {'size KB':>9}")
+    for result in results:
+        rss = result['peak_rss_increase_bytes']
+        print(f"{result['blocks']:>6} {result['trials']:>7} {result['writer']:>9} {result['wall_secs']*1000:>9.1f} "
+              f"{'n/a' if rss is None else format(rss/1024, '.0f'):>13} {result['file_bytes']/1024:>9.1f}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
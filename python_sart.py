@@ -1,11 +1,282 @@
 
+from __future__ import annotations
+
+import csv
+import gc
+import importlib
+import importlib.util
+import json
+import os
 import random
 import pathlib
+import queue
+import socket
+import threading
+import time
+
+import numpy as np
+
+
+class _LazyModule:
+    def __init__(self, global_name:str, module_name:str) -> None:
+        """
+        Stands in for a module that is only imported the first time one of its attributes is used,
+        so that importing python_sart (e.g. for the trial generation or scoring code) does not load
+        PsychoPy or pandas. On first use, the module global is replaced by the real module.
+        Parameters:
+        global_name (str): The name of the module global this object is assigned to.
+        module_name (str): The full name of the module to import.
+        """
+
+        self._global_name = global_name
+        self._module_name = module_name
+
+    def __getattr__(self, attr:str):
+        module = importlib.import_module(self._module_name)
+        globals()[self._global_name] = module
+        return getattr(module, attr)
+
+
+visual = _LazyModule('visual', 'psychopy.visual')
+core = _LazyModule('core', 'psychopy.core')
+data = _LazyModule('data', 'psychopy.data')
+event = _LazyModule('event', 'psychopy.event')
+gui = _LazyModule('gui', 'psychopy.gui')
+pd = _LazyModule('pd', 'pandas')
+
+NUMBERS = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+FONT_SIZES = [1.20, 1.80, 2.35, 2.50, 3.00]
+PRACTICE_FONT_SIZES = [1.20, 3.00]
+
+OUTPUT_FORMATS = {
+    'xlsx': {'suffix': '.xlsx', 'file_filter': "Excel Worksheet (*.xlsx)", 'requires': 'openpyxl'},
+    'parquet': {'suffix': '.parquet', 'file_filter': "Parquet (*.parquet)", 'requires': 'pyarrow'},
+    'feather': {'suffix': '.feather', 'file_filter': "Feather / Arrow IPC (*.feather)", 'requires': 'pyarrow'},
+    'csv': {'suffix': '.csv', 'file_filter': "CSV (*.csv)", 'requires': None},
+}
+
+
+def check_output_format(output_format:str) -> None:
+    """
+    Checks that an output format is known and that the package it needs is installed.
+    Raises:
+    ValueError: If the format is not one of OUTPUT_FORMATS.
+    ImportError: If the package needed to write the format is not installed.
+    """
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"The output format must be one of {', '.join(OUTPUT_FORMATS)}")
+    required = OUTPUT_FORMATS[output_format]['requires']
+    if required is not None and importlib.util.find_spec(required) is None:
+        raise ImportError(f"The {output_format} output format requires the {required} package (pip install {required})")
+
+
+def output_format_for_path(path:str|pathlib.Path) -> str|None:
+    """
+    Returns the output format matching the extension of a file path, or None if the extension is not a known format.
+    """
+
+    suffix = pathlib.Path(path).suffix.lower()
+    for output_format, info in OUTPUT_FORMATS.items():
+        if info['suffix'] == suffix:
+            return output_format
+    return None
+
+
+#The second suffix of the files saved next to an output file (e.g. '.log' in SART_12.log.csv).
+#'.events' is kept for the key press log copy saved with each checkpoint (SART_12.events.npz) and for folders written
+#before the key press log was renamed to events_SART_12.<format>.
+SIDECAR_SUFFIXES = ['.log', '.interrupted', '.session', '.stats', '.timing', '.plan', '.checkpoint', '.collector', '.events']
+
+
+def is_results_file(path:str|pathlib.Path) -> bool:
+    """
+    Returns False for the files saved next to an output file (the trial log, session plan, session table and so on),
+    which match the same file name patterns as the output files (e.g. SART_*.csv matches SART_12.log.csv).
+    """
+
+    suffixes = pathlib.Path(path).suffixes
+    return not (len(suffixes) >= 2 and suffixes[-2].lower() in SIDECAR_SUFFIXES)
+
+
+def write_results(results_df:pd.DataFrame, path:str|pathlib.Path, output_format:str|None=None) -> None:
+    """
+    Writes a results DataFrame to a file.
+    Parameters:
+    results_df (pd.DataFrame): The results to write.
+    path (str|pathlib.Path): The file to write.
+    output_format (str|None): One of 'xlsx', 'parquet', 'feather' or 'csv'. If None, it is chosen from the file extension.
+    """
+
+    output_format = output_format or output_format_for_path(path)
+    if output_format == 'xlsx':
+        results_df.to_excel(path, freeze_panes=(1, 0), index=False)
+    elif output_format == 'parquet':
+        results_df.to_parquet(path, index=False)
+    elif output_format == 'feather':
+        results_df.reset_index(drop=True).to_feather(path)
+    elif output_format == 'csv':
+        results_df.to_csv(path, index=False)
+    else:
+        raise ValueError(f"Unknown output format for {path}")
+
+
+def write_xlsx(trials, path:str|pathlib.Path, session:dict|None=None, chunk_size:int=4096) -> None:
+    """
+    Writes results to an Excel file one row at a time, with openpyxl in write-only mode, so that the memory used does
+    not grow with the number of trials (DataFrame.to_excel() builds every cell of the workbook in memory first).
+    The file matches the one written by DataFrame.to_excel(path, freeze_panes=(1, 0), index=False): one sheet with a
+    frozen header row, and blank cells for missing values.
+    Parameters:
+    trials (dict|ResultsBuffer): The columns to write (a dictionary of column name to array, or a results buffer).
+    path (str|pathlib.Path): The file to write.
+    session (dict|None): If given, the results are written in the wide layout (see wide_results()), with these session
+                         values repeated on every row, without building the wide table in memory.
+    chunk_size (int): The number of rows converted from the arrays at a time.
+    """
+
+    from openpyxl import Workbook
+
+    if isinstance(trials, ResultsBuffer):
+        trials = trials.to_numpy()
+    if session is not None:
+        column_order = WIDE_COLUMNS + [col for col in trials if col not in WIDE_COLUMNS]
+        n_trials = len(trials[WIDE_COLUMNS[7]])
+    else:
+        column_order = list(trials)
+        n_trials = len(trials[column_order[0]]) if len(column_order) > 0 else 0
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Sheet1')
+    sheet.freeze_panes = 'A2'
+    sheet.append(column_order)
+    for start in range(0, n_trials, chunk_size):
+        n_rows = min(chunk_size, n_trials - start)
+        chunk = []
+        for col in column_order:
+            if session is not None and col in SESSION_COLUMNS:
+                #Session values are the same on every row
+                chunk.append([session[col]] * n_rows)
+                continue
+            values = np.asarray(trials[col][start:start + n_rows])
+            cells = values.tolist()
+            if values.dtype.kind in 'fO':
+                for i in np.flatnonzero(pd.isna(values)):
+                    cells[i] = None
+            chunk.append(cells)
+        for row in zip(*chunk):
+            sheet.append(row)
+    workbook.save(path)
+
+
+def read_results(path:str|pathlib.Path, output_format:str|None=None, wide:bool=True, categorical:bool=False) -> pd.DataFrame:
+    """
+    Reads a results file written by write_results().
+    If the file has the normalized layout (a trial table with a session file next to it, see session_file_path()),
+    the trial columns are given their compact dtypes and, if wide is True, the legacy wide layout is rebuilt.
+    Parameters:
+    path (str|pathlib.Path): The file to read.
+    output_format (str|None): One of 'xlsx', 'parquet', 'feather' or 'csv'. If None, it is chosen from the file extension.
+    wide (bool): If True, a normalized file is returned in the wide layout, with the session columns on every row.
+    categorical (bool): If True, the text session columns of a rebuilt wide layout are categorical instead of object columns.
+    Returns:
+    pd.DataFrame: The results.
+    """
+
+    output_format = output_format or output_format_for_path(path)
+    if output_format == 'xlsx':
+        results_df = pd.read_excel(path)
+    elif output_format == 'parquet':
+        results_df = pd.read_parquet(path)
+    elif output_format == 'feather':
+        results_df = pd.read_feather(path)
+    elif output_format == 'csv':
+        results_df = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unknown output format for {path}")
+    session = read_session(path)
+    if session is None:
+        return results_df
+    results_df = results_df.astype({col: dtype for col, dtype in ResultsBuffer.DTYPES.items() if col in results_df.columns})
+    if not wide:
+        return results_df
+    return wide_results(results_df, session, categorical=categorical)
+
+
+SESSION_COLUMNS = ['participant_number', 'gender', 'age', 'year_of_study', 'normal_vision', 'researcher_initials', 'experiment_completed', 'number_to_omit']
+WIDE_COLUMNS = ['participant_number', 'gender', 'age', 'year_of_study', 'normal_vision', 'researcher_initials', 'experiment_completed',
+                'block', 'trial', 'number_to_omit', 'number_shown', 'response_correct', 'response_time', 'last_four_avg']
+
+
+def session_file_path(path:str|pathlib.Path) -> pathlib.Path:
+    """
+    Returns the path of the session table of a results file in the normalized layout, which sits next to it with a '.session.json' suffix.
+    """
+
+    return pathlib.Path(path).with_suffix('.session.json')
+
+
+def write_session(path:str|pathlib.Path, session:dict) -> pathlib.Path:
+    """
+    Writes the session table of a results file in the normalized layout (see session_file_path()).
+    Parameters:
+    path (str|pathlib.Path): The results file.
+    session (dict): The session values (see SART.session_table()).
+    Returns:
+    pathlib.Path: The session file written.
+    """
+
+    session_path = session_file_path(path)
+    with open(session_path, 'w', encoding='utf-8') as session_file:
+        json.dump(session, session_file, indent=2, default=_json_default)
+    return session_path
+
+
+def read_session(path:str|pathlib.Path) -> dict|None:
+    """
+    Reads the session table of a results file in the normalized layout.
+    Returns:
+    dict|None: The session values (participant details, number to omit, whether the session was completed and the
+    trial columns), or None if the results file has the wide layout.
+    """
+
+    session_path = session_file_path(path)
+    if not session_path.exists():
+        return None
+    with open(session_path, 'r', encoding='utf-8') as session_file:
+        return json.load(session_file)
+
+
+def wide_results(trials, session:dict, categorical:bool=False) -> pd.DataFrame:
+    """
+    Builds the wide results layout, with the session values repeated on every trial row.
+    Parameters:
+    trials (pd.DataFrame|dict): The trial columns (a DataFrame, or a dictionary of column name to array).
+    session (dict): The session values, including every column in SESSION_COLUMNS.
+    categorical (bool): If True, the text session columns are categorical instead of object columns.
+    Returns:
+    pd.DataFrame: The results, in the WIDE_COLUMNS order followed by any extra trial columns.
+    """
+
+    n_trials = len(trials[WIDE_COLUMNS[7]])
+    column_order = WIDE_COLUMNS + [col for col in trials if col not in WIDE_COLUMNS]
+    columns = {}
+    for col in column_order:
+        if col in SESSION_COLUMNS:
+            value = session[col]
+            if categorical and isinstance(value, str):
+                value = pd.Categorical.from_codes(np.zeros(n_trials, dtype=np.int8), categories=[value])
+            columns[col] = value
+        else:
+            columns[col] = np.asarray(trials[col])
+    #Session columns that are single values are repeated for every row by pandas
+    return pd.DataFrame(columns, index=pd.RangeIndex(n_trials), copy=False)
+
+class SessionEnded(Exception):
+    """
+    Raised by SART.save_and_quit() instead of quitting when the session does not own its window (see SessionOrchestrator).
+    """
 
-from psychopy import visual, core, data, event, gui, localization
-import pandas as pd
-from PyQt6.QtGui import QIntValidator
-from PyQt6.QtWidgets import QComboBox
 
 class Participant:
     def __init__(self, number:str, gender:str, age:int, year_of_study:str, normal_vision:str, researcher_initials:str):
@@ -43,6 +314,9 @@ class Participant:
         None: If the user pressed Cancel.
         """
 
+        from PyQt6.QtGui import QIntValidator
+        from PyQt6.QtWidgets import QComboBox
+
         # Create a dialog box to collect participant information
 
         gender_options = ["Please Select", 'Male', 'Female', 'Other']
@@ -178,34 +452,1296 @@ class Participant:
                 err_msg += "Please select an option in the Vision field.\n"
                 vision_index = None
 
-            researcher_initials = researcher_initials_field.text()
+            researcher_initials = researcher_initials_field.text()
+
+            if len(err_msg) > 0:
+                err_dlg = gui.Dlg(title="Error")
+                err_dlg.addText(err_msg)
+                err_dlg.show()
+                return Participant.open_info_dialogue(participant_number=participant_number, 
+                                                      gender=gender_index, 
+                                                      age=age, 
+                                                      year_of_study=year_index, 
+                                                      normal_vision=vision_index, 
+                                                      researcher_initials=researcher_initials)
+            
+            
+
+
+            participant = Participant(
+                number=participant_number,
+                gender=gender,
+                age=age,
+                year_of_study=year_of_study,
+                normal_vision=normal_vision,
+                researcher_initials=researcher_initials
+            )
+
+            return participant
+        else:
+            return None
+
+
+class TrialLog:
+    def __init__(self, path:str|pathlib.Path, columns:list, metadata:dict|None=None, flush_every:int=1) -> None:
+        """
+        Opens an append-only CSV log that trial results are streamed to as they are recorded,
+        so that a crash part way through a session does not lose the trials already completed.
+        Parameters:
+        path (str|pathlib.Path): The path of the log file. Any existing file at this path is overwritten.
+        columns (list): The column names, written as the CSV header.
+        metadata (dict|None): Session information written as '# key=value' comment lines above the header.
+        flush_every (int): The number of rows to buffer before the file is flushed. Defaults to 1 (every trial).
+        """
+
+        self.path = pathlib.Path(path)
+        self.columns = list(columns)
+        self.flush_every = max(1, int(flush_every))
+        self._unflushed = 0
+        self._file = open(self.path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        for key, value in (metadata or {}).items():
+            self._file.write(f"# {key}={value}\n")
+        self._writer.writerow(self.columns)
+        self.sync()
+
+    def append(self, row:list) -> None:
+        """
+        Appends a single row to the log. Only a buffered write and, every flush_every rows, a flush to the
+        operating system are done here, so that the cost per trial stays in the microsecond range.
+        Parameters:
+        row (list): The values for the row, in the same order as the columns. None is written as an empty field.
+        """
+
+        self._writer.writerow(['' if value is None else value for value in row])
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self._file.flush()
+            self._unflushed = 0
+
+    def flush(self) -> None:
+        """
+        Flushes any buffered rows to the operating system.
+        """
+
+        self._file.flush()
+        self._unflushed = 0
+
+    def sync(self) -> None:
+        """
+        Flushes any buffered rows and asks the operating system to commit the file to disk.
+        This is slower than append() and should only be called outside of trials, e.g. between blocks.
+        """
+
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unflushed = 0
+
+    def close(self) -> None:
+        """
+        Syncs and closes the log file. Calling close() on an already closed log does nothing.
+        """
+
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+
+    @staticmethod
+    def read(path:str|pathlib.Path) -> tuple[dict, pd.DataFrame]:
+        """
+        Reads a log written by TrialLog, e.g. to recover the data of a session that did not finish.
+        Parameters:
+        path (str|pathlib.Path): The path of the log file.
+        Returns:
+        tuple[dict, pd.DataFrame]: The metadata (values as strings) and a DataFrame with one row per logged trial.
+        """
+
+        metadata = {}
+        with open(path, 'r', newline='', encoding='utf-8') as log_file:
+            for line in log_file:
+                if not line.startswith('#'):
+                    break
+                key, _, value = line[1:].strip().partition('=')
+                metadata[key] = value
+        return metadata, pd.read_csv(path, comment='#')
+
+
+class BackgroundWriter:
+    _SYNC = object()
+    _STOP = object()
+
+    def __init__(self, trial_log:TrialLog, max_queue_size:int=1000, batch_size:int=64) -> None:
+        """
+        Writes rows to a TrialLog from a background thread, so that no disk I/O happens on the thread
+        that draws the stimuli. Rows are put on a bounded queue and written in batches, but only while
+        writes are allowed (see allow_writes() and pause_writes()), e.g. during the mask or between blocks.
+        The log is flushed as set by its flush_every.
+        If writing to the log fails (e.g. the disk is full), the error is kept in error and the remaining rows
+        are discarded instead of written, so that put() never blocks the task.
+        Parameters:
+        trial_log (TrialLog): The log to write the rows to.
+        max_queue_size (int): The maximum number of rows waiting to be written. put() blocks if the queue is full.
+        batch_size (int): The maximum number of rows written at a time.
+        """
+
+        self.trial_log = trial_log
+        self.batch_size = batch_size
+        self.error:Exception = None
+        self.rows_dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._allowed = threading.Event()
+        self._allowed.set()
+        self.max_queue_depth = 0
+        self.rows_written = 0
+        self.batches = 0
+        self.flush_secs_total = 0.0
+        self.flush_secs_max = 0.0
+        self.latency_secs_total = 0.0
+        self.latency_secs_max = 0.0
+        self._thread = threading.Thread(target=self._run, name="SART background writer", daemon=True)
+        self._thread.start()
+
+    def put(self, row:list) -> None:
+        """
+        Queues a row to be written. This only blocks if the queue is full. If the log can no longer be written to
+        (or the writer thread has stopped), the row is discarded.
+        """
+
+        if self.error is not None or not self._thread.is_alive():
+            self.rows_dropped += 1
+            return
+        self._queue.put((time.perf_counter(), row))
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def sync(self) -> None:
+        """
+        Queues a request to commit the log to disk (see TrialLog.sync()) once the rows before it are written.
+        """
+
+        if self.error is None and self._thread.is_alive():
+            self._queue.put((None, self._SYNC))
+
+    def allow_writes(self) -> None:
+        """
+        Lets the writer thread write any queued rows.
+        """
+
+        self._allowed.set()
+
+    def pause_writes(self) -> None:
+        """
+        Stops the writer thread from starting another batch until allow_writes() is called.
+        """
+
+        self._allowed.clear()
+
+    @property
+    def queue_depth(self) -> int:
+        """
+        The number of rows (and sync requests) waiting to be written.
+        """
+
+        return self._queue.qsize()
+
+    def close(self, timeout:float=5.0) -> bool:
+        """
+        Writes the remaining rows and closes the log, waiting at most timeout seconds.
+        Parameters:
+        timeout (float): The maximum time to wait for the queue to drain, in seconds.
+        Returns:
+        bool: True if every row was written and the log was closed, False if the time limit was reached or writing failed.
+        """
+
+        self.allow_writes()
+        if self._thread.is_alive():
+            self._queue.put((None, self._STOP))
+            self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"The trial log writer did not finish within {timeout}s. {self.queue_depth} rows were not written to {self.trial_log.path}.")
+            return False
+        if self.error is None:
+            try:
+                self.trial_log.close()
+            except (OSError, ValueError) as e:
+                self.error = e
+        if self.error is not None:
+            print(f"Writing the trial log {self.trial_log.path} failed ({self.error}). {self.rows_dropped} rows were not written to it.")
+            return False
+        return True
+
+    def stats(self) -> dict:
+        """
+        Returns the current and maximum queue depth, the number of rows and batches written, the mean and maximum time
+        taken to write a batch, the mean and maximum time from a row being queued to it being written, the number of rows
+        discarded after a write error, and the error (None if there was none).
+        """
+
+        return {
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'rows_written': self.rows_written,
+            'batches': self.batches,
+            'flush_secs_mean': self.flush_secs_total / self.batches if self.batches else 0.0,
+            'flush_secs_max': self.flush_secs_max,
+            'latency_secs_mean': self.latency_secs_total / self.rows_written if self.rows_written else 0.0,
+            'latency_secs_max': self.latency_secs_max,
+            'rows_dropped': self.rows_dropped,
+            'error': None if self.error is None else str(self.error),
+        }
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            self._allowed.wait()
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            start_time = time.perf_counter()
+            stop = any(row is self._STOP for _, row in batch)
+            if self.error is not None:
+                #The log cannot be written to, so the queue is only drained
+                self.rows_dropped += sum(1 for _, row in batch if row is not self._STOP and row is not self._SYNC)
+                if stop:
+                    return
+                continue
+            rows = 0
+            for i, (queued_time, row) in enumerate(batch):
+                try:
+                    if row is self._SYNC:
+                        self.trial_log.sync()
+                    elif row is not self._STOP:
+                        self.trial_log.append(row)
+                        rows += 1
+                        latency = start_time - queued_time
+                        self.latency_secs_total += latency
+                        self.latency_secs_max = max(self.latency_secs_max, latency)
+                except (OSError, ValueError) as e:
+                    self.error = e
+                    self.rows_dropped += sum(1 for _, row in batch[i:] if row is not self._STOP and row is not self._SYNC)
+                    print(f"Could not write to the trial log {self.trial_log.path} ({e}). The remaining trials will only be in the output file.")
+                    break
+            flush_secs = time.perf_counter() - start_time
+            self.rows_written += rows
+            self.batches += 1
+            self.flush_secs_total += flush_secs
+            self.flush_secs_max = max(self.flush_secs_max, flush_secs)
+            if stop:
+                return
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class CollectorClient:
+    _STOP = object()
+
+    def __init__(self, address:str, station:str, session:str, columns:list, metadata:dict, fallback_path:str|pathlib.Path,
+                 max_queue_size:int=1000, batch_size:int=64, timeout:float=2.0, retries:int=3, retry_delay:float=0.5) -> None:
+        """
+        Streams trial rows to a collector service (see sart_collector.py) from a background thread.
+        Rows are sent in batches of newline-delimited JSON over TCP, and each batch waits for the collector to confirm
+        that it has been stored before the next one is sent. A failed batch is retried, reconnecting each time. If the
+        collector cannot be reached after the retries, the session falls back to local disk: the unsent batches and every
+        later batch are written to the fallback file, which can be sent to the collector later with 'sart_collector.py upload'.
+        Parameters:
+        address (str): The collector address, as 'host:port'.
+        station (str): The name of this computer, stored with every row.
+        session (str): An identifier of the session, unique across stations.
+        columns (list): The names of the values in each row.
+        metadata (dict): Information about the session (e.g. the participant details), sent once when connecting.
+        fallback_path (str|pathlib.Path): The file unsent batches are written to if the collector cannot be reached.
+        max_queue_size (int): The maximum number of rows waiting to be sent. put() does not wait if the queue is full:
+                              the row is kept in an overflow list that is sent once the queue is empty.
+        batch_size (int): The maximum number of rows sent at a time.
+        timeout (float): The time to wait for the collector to connect or confirm a batch, in seconds.
+        retries (int): The number of times a batch is retried before falling back to local disk.
+        retry_delay (float): The time to wait before the first retry, in seconds. It doubles with each retry.
+        """
+
+        host, port = address.rsplit(':', 1)
+        self.address = (host, int(port))
+        self.station = station
+        self.session = session
+        self.columns = list(columns)
+        self.metadata = metadata
+        self.fallback_path = pathlib.Path(fallback_path)
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._overflow = []
+        self._socket = None
+        self._reader = None
+        self.offline = False
+        self.rows_sent = 0
+        self.rows_spooled = 0
+        self.batches = 0
+        self.retries_made = 0
+        self.overflowed = 0
+        self._in_flight = []
+        self._abandoned = False
+        #Guards handing rows between put(), the sending thread and close(), so that every row is either sent or spooled
+        self._rows_ready = threading.Condition()
+        self._spool_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="SART collector client", daemon=True)
+        self._thread.start()
+
+    def put(self, row:list) -> None:
+        """
+        Queues a row to be sent. This never waits for the network (only, briefly, for the sending thread to take or finish a batch).
+        """
+
+        with self._rows_ready:
+            try:
+                self._queue.put_nowait(row)
+            except queue.Full:
+                self._overflow.append(row)
+                self.overflowed += 1
+            self._rows_ready.notify()
+
+    def close(self, timeout:float=5.0) -> bool:
+        """
+        Sends (or spools) the remaining rows, tells the collector the session has ended and disconnects,
+        waiting at most timeout seconds. If the time limit is reached (e.g. while retrying an unreachable collector),
+        the rows that have not been confirmed yet are written to the fallback file instead, and the client stops.
+        A batch that the collector stored just as the time ran out can end up in the fallback file too; the collector
+        ignores it when the file is uploaded.
+        Returns:
+        bool: True if the client finished within the time limit.
+        """
+
+        deadline = time.perf_counter() + timeout
+        #The stop marker goes to the overflow list if the queue is full, so it is still taken after the rows before it
+        self.put(self._STOP)
+        self._thread.join(max(0.0, deadline - time.perf_counter()))
+        if not self._thread.is_alive():
+            return True
+        with self._rows_ready:
+            self._abandoned = True
+            rows = list(self._in_flight)
+            self._in_flight = []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            rows.extend(self._overflow)
+            self._overflow = []
+            rows = [row for row in rows if row is not self._STOP]
+            self._rows_ready.notify()
+        #Stop a request that is waiting for the collector, so that the batch just spooled is not sent as well
+        connection = self._socket
+        if connection is not None:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if rows:
+            self._spool({'type': 'rows', 'session': self.session, 'rows': rows})
+            self.rows_spooled += len(rows)
+        self.offline = True
+        print(f"The collector client did not finish within {timeout}s. {len(rows)} rows were saved to {self.fallback_path} instead.")
+        return False
+
+    def stats(self) -> dict:
+        """
+        Returns the number of rows sent to the collector and written to the fallback file, the number of batches sent,
+        the number of retries, the number of rows that overflowed the queue, and whether the client fell back to local disk.
+        """
+
+        return {'rows_sent': self.rows_sent, 'rows_spooled': self.rows_spooled, 'batches': self.batches,
+                'retries': self.retries_made, 'overflowed': self.overflowed, 'offline': self.offline}
+
+    def _hello(self) -> dict:
+        return {'type': 'hello', 'station': self.station, 'session': self.session, 'columns': self.columns, 'metadata': self.metadata}
+
+    def _connect(self) -> None:
+        self._disconnect()
+        self._socket = socket.create_connection(self.address, timeout=self.timeout)
+        self._reader = self._socket.makefile('r', encoding='utf-8')
+        self._request(self._hello())
+
+    def _disconnect(self) -> None:
+        if self._socket is not None:
+            try:
+                self._reader.close()
+                self._socket.close()
+            except OSError:
+                pass
+        self._socket = None
+        self._reader = None
+
+    def _request(self, message:dict) -> dict:
+        self._socket.sendall((json.dumps(message, default=_json_default) + "\n").encode('utf-8'))
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("The collector closed the connection")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            raise ConnectionError(f"The collector rejected the request: {reply.get('error')}")
+        return reply
+
+    def _spool(self, message:dict) -> None:
+        with self._spool_lock, open(self.fallback_path, 'a', encoding='utf-8') as fallback_file:
+            new_file = fallback_file.tell() == 0
+            if new_file:
+                fallback_file.write(json.dumps(self._hello(), default=_json_default) + "\n")
+            fallback_file.write(json.dumps(message, default=_json_default) + "\n")
+
+    def _send(self, message:dict) -> bool:
+        """
+        Sends a message, retrying and reconnecting if it fails.
+        Returns:
+        bool: True if the collector confirmed the message, False if it should be spooled instead
+        (the collector could not be reached, or close() has given up waiting).
+        """
+
+        if self.offline:
+            return False
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            if self._abandoned:
+                return False
+            try:
+                if self._socket is None:
+                    self._connect()
+                self._request(message)
+                return True
+            except (OSError, ValueError) as e:
+                self._disconnect()
+                if self._abandoned:
+                    return False
+                if attempt == self.retries:
+                    print(f"Could not reach the collector at {self.address[0]}:{self.address[1]} ({e}). "
+                          f"Saving the rows to {self.fallback_path} instead.")
+                    self.offline = True
+                    return False
+                self.retries_made += 1
+                time.sleep(delay)
+                delay *= 2
+        return False
+
+    def _take_batch(self) -> tuple[list, bool]:
+        """
+        Waits for rows and takes up to batch_size of them (plus any overflow), recording them as in flight in the same step,
+        so that close() spools them if it gives up. Returns the rows and whether the stop marker was reached.
+        """
+
+        with self._rows_ready:
+            while self._queue.empty() and not self._overflow and not self._abandoned:
+                self._rows_ready.wait()
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            #The overflow rows were put after the queue filled up, so they are taken once the queue is empty
+            if self._queue.empty():
+                batch.extend(self._overflow)
+                self._overflow = []
+            stop = any(row is self._STOP for row in batch)
+            rows = [row for row in batch if row is not self._STOP]
+            self._in_flight = rows
+            return rows, stop
+
+    def _run(self) -> None:
+        while True:
+            rows, stop = self._take_batch()
+            if self._abandoned:
+                return
+            if rows:
+                message = {'type': 'rows', 'session': self.session, 'rows': rows}
+                sent = self._send(message)
+                with self._rows_ready:
+                    if self._abandoned:
+                        #close() has spooled the rows in flight
+                        return
+                    if sent:
+                        self.rows_sent += len(rows)
+                        self.batches += 1
+                    else:
+                        self._spool(message)
+                        self.rows_spooled += len(rows)
+                    self._in_flight = []
+            if stop:
+                message = {'type': 'end', 'session': self.session, 'rows': self.rows_sent + self.rows_spooled}
+                if not self._send(message) and not self._abandoned:
+                    self._spool(message)
+                self._disconnect()
+                return
+
+
+class ResultsBuffer:
+    DTYPES = {
+        'block': np.int16,
+        'trial': np.int32,
+        'number_shown': np.int8,
+        'response_correct': np.bool_,
+        'response_time': np.float64,
+        'last_four_avg': np.float64,
+    }
+
+    def __init__(self, capacity:int, omit_number:int, extra_columns:dict|None=None) -> None:
+        """
+        Initializes a preallocated, column-oriented store for trial results.
+        Each column is a NumPy array with a compact dtype, and missing response times are stored as NaN.
+        The buffer also keeps the rolling state needed for the pre-no-go (last four) average, so that
+        it can be read in constant time without slicing the stored columns.
+        Parameters:
+        capacity (int): The number of trials to allocate space for. The buffer grows if more trials are added.
+        omit_number (int): The number on which participants should withhold a response.
+        extra_columns (dict|None): Optional additional columns (name to NumPy dtype) stored after the standard ones.
+        """
+
+        self.omit_number = omit_number
+        dtypes = {**self.DTYPES, **(extra_columns or {})}
+        self.columns = list(dtypes)
+        self.extra_columns = list(extra_columns or {})
+        self._data = {col: np.empty(max(1, capacity), dtype=dtype) for col, dtype in dtypes.items()}
+        self._length = 0
+        self._recent_response_times = [0.0, 0.0, 0.0, 0.0]
+        self._recent_index = 0
+        self._valid_streak = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, column:str) -> np.ndarray:
+        """
+        Returns a view of the filled part of a column.
+        """
+
+        return self._data[column][:self._length]
+
+    def _grow(self) -> None:
+        for col, values in self._data.items():
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:self._length] = values[:self._length]
+            self._data[col] = grown
+
+    def append(self, block_num:int, trial_num:int, number_shown:int, response_correct:bool, response_time:float|None, last_four_avg:float|None, **extra) -> None:
+        """
+        Stores one trial and updates the rolling pre-no-go state.
+        Parameters:
+        block_num (int): The block number.
+        trial_num (int): The trial number.
+        number_shown (int): The number shown in the trial.
+        response_correct (bool): Indicates if the response was correct.
+        response_time (float|None): The response time, or None if there was no response.
+        last_four_avg (float|None): The average response time for the last four trials, or None.
+        **extra: Values for the extra columns. Extra columns that are not given are stored as NaN (or 0 for integer columns).
+        """
+
+        if self._length == len(self._data['block']):
+            self._grow()
+        i = self._length
+        self._data['block'][i] = block_num
+        self._data['trial'][i] = trial_num
+        self._data['number_shown'][i] = number_shown
+        self._data['response_correct'][i] = response_correct
+        self._data['response_time'][i] = np.nan if response_time is None else response_time
+        self._data['last_four_avg'][i] = np.nan if last_four_avg is None else last_four_avg
+        for col in self.extra_columns:
+            value = extra.get(col)
+            if value is None:
+                value = np.nan if self._data[col].dtype.kind == 'f' else 0
+            self._data[col][i] = value
+        self._length += 1
+
+        if number_shown == self.omit_number or response_time is None:
+            self._valid_streak = 0
+        else:
+            self._recent_response_times[self._recent_index] = response_time
+            self._recent_index = (self._recent_index + 1) % 4
+            self._valid_streak += 1
+
+    def last_four_avg(self) -> float|None:
+        """
+        Returns the average response time of the last four trials, or None if any of them showed the
+        omitted number, had no response, or if fewer than four trials have been recorded.
+        """
+
+        if self._valid_streak < 4:
+            return None
+        recent = self._recent_response_times
+        return (recent[0] + recent[1] + recent[2] + recent[3]) / 4
+
+    def to_numpy(self) -> dict[str, np.ndarray]:
+        """
+        Returns a dictionary of column name to a view (not a copy) of the filled part of each column.
+        """
+
+        return {col: self[col] for col in self.columns}
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Returns the results as a pandas DataFrame built on the stored arrays without copying them.
+        """
+
+        return pd.DataFrame(self.to_numpy(), copy=False)
+
+
+class KeyEventLog:
+    PHASES = ['stimulus', 'mask', 'feedback']
+    DTYPES = {
+        'block': np.int16,
+        'trial': np.int32,
+        'phase': np.int8,
+        'key': np.int16,
+        'time': np.float64,
+    }
+
+    def __init__(self, capacity:int) -> None:
+        """
+        Initializes a preallocated, column-oriented log of every key press in the session, including presses after the
+        first one in a trial and presses during practice feedback.
+        The phase and the key name are stored as small integer codes (indexes into PHASES and keys).
+        Parameters:
+        capacity (int): The number of presses to allocate space for. The log grows if more presses are added.
+        """
+
+        self.keys = []
+        self._key_codes = {}
+        self._data = {col: np.empty(max(1, capacity), dtype=dtype) for col, dtype in self.DTYPES.items()}
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, column:str) -> np.ndarray:
+        """
+        Returns a view of the filled part of a column.
+        """
+
+        return self._data[column][:self._length]
+
+    def _grow(self) -> None:
+        for col, values in self._data.items():
+            grown = np.empty(len(values) * 2, dtype=values.dtype)
+            grown[:self._length] = values[:self._length]
+            self._data[col] = grown
+
+    def append(self, block_num:int, trial_num:int, phase:str, key:str, time:float) -> None:
+        """
+        Stores one key press.
+        Parameters:
+        block_num (int): The block number (0 for the practice block).
+        trial_num (int): The trial number within the block.
+        phase (str): The part of the trial the press was made in: 'stimulus', 'mask' or 'feedback'.
+        key (str): The key name.
+        time (float): The time of the press, in seconds from the stimulus onset.
+        """
+
+        if self._length == len(self._data['block']):
+            self._grow()
+        key_code = self._key_codes.get(key)
+        if key_code is None:
+            key_code = self._key_codes[key] = len(self.keys)
+            self.keys.append(key)
+        i = self._length
+        self._data['block'][i] = block_num
+        self._data['trial'][i] = trial_num
+        self._data['phase'][i] = self.PHASES.index(phase)
+        self._data['key'][i] = key_code
+        self._data['time'][i] = time
+        self._length += 1
+
+    def select(self, mask:np.ndarray) -> KeyEventLog:
+        """
+        Returns a new log with only the presses where mask is True.
+        """
+
+        n_selected = int(np.count_nonzero(mask))
+        selected = KeyEventLog(n_selected)
+        selected.keys = list(self.keys)
+        selected._key_codes = dict(self._key_codes)
+        for col in self.DTYPES:
+            selected._data[col][:n_selected] = self[col][mask]
+        selected._length = n_selected
+        return selected
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Returns the presses as a pandas DataFrame, with the phase and key as categorical columns.
+        """
+
+        columns = {col: self[col] for col in self.DTYPES}
+        columns['phase'] = pd.Categorical.from_codes(self['phase'], categories=self.PHASES)
+        columns['key'] = pd.Categorical.from_codes(self['key'], categories=self.keys)
+        return pd.DataFrame(columns, copy=False)
+
+    def save(self, path:str|pathlib.Path) -> None:
+        """
+        Saves the log to a NumPy .npz file, writing a temporary file first and then renaming it.
+        """
+
+        path = pathlib.Path(path)
+        temp_path = path.with_suffix('.tmp.npz')
+        np.savez(temp_path, keys=np.array(self.keys, dtype=str), **{col: self[col] for col in self.DTYPES})
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path:str|pathlib.Path) -> KeyEventLog:
+        """
+        Loads a log saved with save().
+        """
+
+        with np.load(path) as saved:
+            log = cls(len(saved['block']))
+            for key in saved['keys'].tolist():
+                log._key_codes[key] = len(log.keys)
+                log.keys.append(key)
+            for col in cls.DTYPES:
+                log._data[col][:len(saved[col])] = saved[col]
+            log._length = len(saved['block'])
+        return log
+
+
+class LiveStats:
+    def __init__(self, omit_number:int, anticipatory_secs:float=0.1) -> None:
+        """
+        Running performance statistics for a set of trials (a block or the whole session), updated in constant time per trial.
+        The response time mean and variance of go trials (trials not showing the number to omit) are kept with Welford's algorithm.
+        Parameters:
+        omit_number (int): The number on which participants should withhold a response.
+        anticipatory_secs (float): Responses faster than this (in seconds) are counted as anticipatory.
+        """
+
+        self.omit_number = omit_number
+        self.anticipatory_secs = anticipatory_secs
+        self.trials = 0
+        self.correct = 0
+        self.nogo_trials = 0
+        self.commission_errors = 0
+        self.omission_errors = 0
+        self.responses = 0
+        self.anticipatory_responses = 0
+        self.rt_count = 0
+        self.rt_mean = 0.0
+        self._rt_m2 = 0.0
+
+    def update(self, number_shown:int, response_correct:bool, response_time:float|None) -> None:
+        """
+        Adds a trial to the statistics.
+        Parameters:
+        number_shown (int): The number shown in the trial.
+        response_correct (bool): Whether the response was correct.
+        response_time (float|None): The response time, or None if there was no response.
+        """
+
+        self.trials += 1
+        self.correct += bool(response_correct)
+        nogo = number_shown == self.omit_number
+        if nogo:
+            self.nogo_trials += 1
+            self.commission_errors += not response_correct
+        else:
+            self.omission_errors += not response_correct
+        if response_time is None:
+            return
+        self.responses += 1
+        self.anticipatory_responses += response_time < self.anticipatory_secs
+        if not nogo:
+            self.rt_count += 1
+            delta = response_time - self.rt_mean
+            self.rt_mean += delta / self.rt_count
+            self._rt_m2 += delta * (response_time - self.rt_mean)
+
+    @property
+    def rt_sd(self) -> float|None:
+        """
+        The sample standard deviation of the go trial response times, or None if there are fewer than two.
+        """
+
+        if self.rt_count < 2:
+            return None
+        return (self._rt_m2 / (self.rt_count - 1)) ** 0.5
+
+    def to_dict(self) -> dict:
+        """
+        Returns the statistics as a dictionary: the numbers of trials, no-go trials, commission and omission errors and responses,
+        the accuracy, the commission and omission rates, the mean and standard deviation of the go trial response times,
+        and the fraction of responses that were anticipatory. Rates and response time measures are None until they can be calculated.
+        """
+
+        go_trials = self.trials - self.nogo_trials
+        return {
+            'trials': self.trials,
+            'nogo_trials': self.nogo_trials,
+            'commission_errors': self.commission_errors,
+            'omission_errors': self.omission_errors,
+            'responses': self.responses,
+            'accuracy': self.correct / self.trials if self.trials else None,
+            'commission_rate': self.commission_errors / self.nogo_trials if self.nogo_trials else None,
+            'omission_rate': self.omission_errors / go_trials if go_trials else None,
+            'rt_mean': self.rt_mean if self.rt_count else None,
+            'rt_sd': self.rt_sd,
+            'anticipatory_fraction': self.anticipatory_responses / self.responses if self.responses else None,
+        }
+
+
+class EventResponseBackend:
+    name = 'event'
+
+    def clear(self) -> None:
+        """
+        Discards any key presses that have not been collected yet.
+        """
+
+        event.clearEvents()
+
+    def get_presses(self, keys:list, clock:core.Clock) -> list[tuple[str, float]]:
+        """
+        Collects the key presses since the last call using the pyglet event queue.
+        The timestamps are assigned when the events are pumped (usually at a window flip), not when the key was pressed.
+        Parameters:
+        keys (list|None): The key names to collect, or None to collect every key.
+        clock (core.Clock): The clock the timestamps are relative to.
+        Returns:
+        list[tuple[str, float]]: A (key, time) tuple for each press, in the order they were pressed.
+        """
+
+        return [(key, time) for key, time in event.getKeys(keys, timeStamped=clock)]
+
+
+class KeyboardResponseBackend:
+    name = 'keyboard'
+
+    def __init__(self) -> None:
+        """
+        Creates a response backend using psychopy.hardware.keyboard. With the psychtoolbox backend,
+        the keyboard is polled in its own thread and each press is timestamped when it happens,
+        with sub-millisecond precision.
+        """
+
+        from psychopy.hardware import keyboard
+        self.keyboard = keyboard.Keyboard()
+
+    def clear(self) -> None:
+        """
+        Discards any key presses that have not been collected yet.
+        """
+
+        self.keyboard.clearEvents()
+
+    def get_presses(self, keys:list, clock:core.Clock) -> list[tuple[str, float]]:
+        """
+        Collects the key presses since the last call, including presses where the key has not been released yet.
+        Parameters:
+        keys (list|None): The key names to collect, or None to collect every key.
+        clock (core.Clock): The clock the timestamps are relative to.
+        Returns:
+        list[tuple[str, float]]: A (key, time) tuple for each press, in the order they were pressed.
+        """
+
+        self.keyboard.clock = clock
+        return [(key_press.name, key_press.rt) for key_press in self.keyboard.getKeys(keyList=keys, waitRelease=False)]
+
+
+class StimulusCache:
+    def __init__(self, window:visual.Window) -> None:
+        """
+        Holds every stimulus used in the trials, built once per session so that trials only
+        have to pick a ready-made stimulus instead of creating one or changing its text or height.
+        Parameters:
+        window (visual.Window): The window the stimuli are drawn in.
+        """
+
+        self.window = window
+        self.x_stim = None
+        self.circle_stim = None
+        self.correct_stim = None
+        self.incorrect_stim = None
+        self.number_stims = {}
+        self.hits = 0
+        self.misses = 0
+        self.build_secs = 0.0
+        self.warm_up_stats = []
+
+    def build(self, numbers:list=NUMBERS, font_sizes:list=FONT_SIZES+PRACTICE_FONT_SIZES) -> None:
+        """
+        Creates the mask, feedback and number stimuli. A number stimulus is created for every
+        combination of number and font size that does not already exist in the cache.
+        Parameters:
+        numbers (list): The numbers that can be shown.
+        font_sizes (list): The font sizes that can be used, including the practice sizes.
+        """
+
+        start_time = core.getTime()
+        if self.x_stim is None:
+            self.x_stim = visual.TextStim(self.window, text="X", height=3.35, color="white", 
+                                pos=(0, 0))
+            self.circle_stim = visual.Circle(self.window, radius=1.50, lineWidth=8,
+                                    lineColor="white", pos=(0, -0.2))
+            self.correct_stim = visual.TextStim(self.window, text="CORRECT", color="green", 
+                                        font="Arial", pos=(0, 0))
+            self.incorrect_stim = visual.TextStim(self.window, text="INCORRECT", color="red",
+                                            font="Arial", pos=(0, 0))
+        for number in numbers:
+            for font_size in font_sizes:
+                if (number, font_size) not in self.number_stims:
+                    self.number_stims[(number, font_size)] = self._create_number_stim(number, font_size)
+        self.build_secs += core.getTime() - start_time
+
+    def _create_number_stim(self, number:int, font_size:float) -> visual.TextStim:
+        return visual.TextStim(self.window, text=str(number), height=font_size, font="Arial", color="white", pos=(0, 0))
+
+    def number_stim(self, number:int, font_size:float) -> visual.TextStim:
+        """
+        Returns the stimulus showing the given number at the given font size.
+        A stimulus missing from the cache is created (and counted as a miss), so after build() this should never happen.
+        """
+
+        stim = self.number_stims.get((number, font_size))
+        if stim is not None:
+            self.hits += 1
+            return stim
+        self.misses += 1
+        start_time = core.getTime()
+        stim = self.number_stims[(number, font_size)] = self._create_number_stim(number, font_size)
+        self.build_secs += core.getTime() - start_time
+        return stim
+
+    def stats(self) -> dict:
+        """
+        Returns the number of cached number stimuli, the cache hits and misses, and the total time spent building stimuli.
+        """
+
+        return {'size': len(self.number_stims), 'hits': self.hits, 'misses': self.misses, 'build_secs': self.build_secs,
+                'warm_ups': len(self.warm_up_stats)}
+
+    def reset_stats(self) -> None:
+        """
+        Starts the hit, miss, build time and warm-up statistics again, keeping the cached stimuli
+        (e.g. when the cache is handed on to the next session by a SessionOrchestrator).
+        """
+
+        self.hits = 0
+        self.misses = 0
+        self.build_secs = 0.0
+        self.warm_up_stats = []
+
+    def all_stims(self) -> list:
+        """
+        Returns every stimulus in the cache: the mask, the feedback and the number stimuli.
+        """
+
+        return [self.x_stim, self.circle_stim, self.correct_stim, self.incorrect_stim] + list(self.number_stims.values())
+
+    def warm_up(self) -> dict:
+        """
+        Draws every stimulus to the back buffer twice and then clears it, so that nothing is shown.
+        The first draw of a stimulus prepares its fonts, textures and shaders, which would otherwise happen
+        on its first trial. The time of the first and the second pass are measured, i.e. the drawing time
+        before and after warm-up.
+        Returns:
+        dict: The time of the first and second pass in seconds, and the slowest single draw of each pass.
+        These are also added to the warm_up_stats list.
+        """
+
+        stats = {}
+        for draw_pass in ['first', 'second']:
+            pass_start_time = core.getTime()
+            slowest = 0.0
+            for stim in self.all_stims():
+                start_time = core.getTime()
+                stim.draw()
+                slowest = max(slowest, core.getTime() - start_time)
+            stats[f'{draw_pass}_pass_secs'] = core.getTime() - pass_start_time
+            stats[f'{draw_pass}_pass_max_draw_secs'] = slowest
+        self.window.clearBuffer()
+        self.warm_up_stats.append(stats)
+        return stats
+
+
+class CountdownBar:
+    BAR_WIDTH = 20
+
+    def __init__(self, window:visual.Window, frame_period:float) -> None:
+        """
+        A loading bar with a seconds label, shown before a block starts.
+        The stimuli are created once and reused each time the countdown is shown.
+        Parameters:
+        window (visual.Window): The window to draw the countdown in.
+        frame_period (float): The duration of one screen refresh in seconds.
+        """
+
+        self.window = window
+        self.frame_period = frame_period
+        self.background_bar = visual.Rect(window, width=self.BAR_WIDTH, height=1, pos=(0, 0), fillColor="gray")
+        self.loading_bar = visual.Rect(window, width=0, height=1, pos=(-self.BAR_WIDTH/2, 0), fillColor="green", anchor="left")
+        self.label = visual.TextStim(window, text="", pos=(0, -2), color="white")
+        self.stats = {}
+
+    def show(self, seconds:float) -> dict:
+        """
+        Shows the countdown for the given number of seconds.
+        The bar width for every frame is computed before the countdown starts, and the label
+        text is only changed when the number of seconds remaining changes.
+        Parameters:
+        seconds (float): The number of seconds to show the countdown for.
+        Returns:
+        dict: The wall time, CPU time, number of frames and number of dropped frames (flip intervals
+        longer than 1.5 frame periods) of the countdown. This is also kept in the stats attribute.
+        """
+
+        n_frames = max(1, int(seconds / self.frame_period))
+        widths = np.linspace(0, self.BAR_WIDTH, n_frames + 1)
+        shown_digit = None
+        frames = 0
+        dropped_frames = 0
+        cpu_start_time = time.process_time()
+        start_time = last_flip_time = core.getTime()
+        now = start_time
+        while now - start_time < seconds:
+            elapsed = now - start_time
+            digit = int(seconds - elapsed) + 1
+            if digit != shown_digit:
+                self.label.setText(f"{digit}")
+                shown_digit = digit
+            self.loading_bar.width = widths[min(int(elapsed / self.frame_period), n_frames)]
+            self.label.draw()
+            self.background_bar.draw()
+            self.loading_bar.draw()
+            self.window.flip()
+            now = core.getTime()
+            if now - last_flip_time > 1.5 * self.frame_period:
+                dropped_frames += 1
+            last_flip_time = now
+            frames += 1
+        self.window.flip()
+
+        self.stats = {
+            'wall_secs': core.getTime() - start_time,
+            'cpu_secs': time.process_time() - cpu_start_time,
+            'frames': frames,
+            'dropped_frames': dropped_frames,
+        }
+        return self.stats
+
+
+class RushMode:
+    def __init__(self, cpu:int|None=None, raise_priority:bool=True) -> None:
+        """
+        Protects the trials from the garbage collector and from the OS scheduler while a block is running.
+        When entered, the process priority is raised with core.rush (where PsychoPy supports it on this platform),
+        a full garbage collection is run, the surviving objects are frozen so later collections skip them, and
+        automatic collection is disabled, so it cannot run while a stimulus is shown or a response is collected.
+        The garbage of each trial is collected between trials (see between_trials()), so it does not build up over
+        the block. When exited (between blocks and before message screens), automatic collection is enabled again,
+        the remaining garbage is collected and the priority is lowered.
+        Parameters:
+        cpu (int|None): A CPU to pin the process to while the mode is active (where the OS supports it). If None, the process is not pinned.
+        raise_priority (bool): If False, only the garbage collector is controlled.
+        """
+
+        self.cpu = cpu
+        self.raise_priority = raise_priority
+        self.active = False
+        self.priority_raised = False
+        self.pinned = False
+        self._previous_affinity = None
+        self._gc_was_enabled = True
+        self.stats = {'blocks': 0, 'priority_raised': False, 'pinned': False, 'collect_secs_total': 0.0, 'collect_secs_max': 0.0, 'collected_objects': 0,
+                      'trial_collections': 0, 'trial_collect_secs_max': 0.0}
+
+    def _collect(self) -> float:
+        start_time = time.perf_counter()
+        collected = gc.collect()
+        collect_secs = time.perf_counter() - start_time
+        self.stats['collect_secs_total'] += collect_secs
+        self.stats['collect_secs_max'] = max(self.stats['collect_secs_max'], collect_secs)
+        self.stats['collected_objects'] += collected
+        return collect_secs
+
+    def between_trials(self) -> None:
+        """
+        Collects the garbage of the last trial, after its response window and before the next stimulus is drawn.
+        As the objects that existed when the mode was entered are frozen, only the objects made since are examined.
+        Does nothing if the mode is not active.
+        """
+
+        if not self.active:
+            return
+        collect_secs = self._collect()
+        self.stats['trial_collections'] += 1
+        self.stats['trial_collect_secs_max'] = max(self.stats['trial_collect_secs_max'], collect_secs)
+
+    def enter(self) -> None:
+        """
+        Starts the mode, before the trials of a block. Does nothing if the mode is already active.
+        """
+
+        if self.active:
+            return
+        self.active = True
+        self.stats['blocks'] += 1
+        if self.raise_priority:
+            try:
+                self.priority_raised = bool(core.rush(True))
+            except (ImportError, AttributeError, OSError) as e:
+                print(f"Could not raise the process priority ({e})")
+                self.priority_raised = False
+            self.stats['priority_raised'] = self.stats['priority_raised'] or self.priority_raised
+        if self.cpu is not None and hasattr(os, 'sched_setaffinity'):
+            try:
+                self._previous_affinity = os.sched_getaffinity(0)
+                os.sched_setaffinity(0, {self.cpu})
+                self.pinned = True
+                self.stats['pinned'] = True
+            except OSError as e:
+                print(f"Could not pin the process to CPU {self.cpu} ({e})")
+        self._gc_was_enabled = gc.isenabled()
+        self._collect()
+        gc.freeze()
+        gc.disable()
+
+    def exit(self) -> None:
+        """
+        Ends the mode, after the trials of a block. Does nothing if the mode is not active.
+        """
+
+        if not self.active:
+            return
+        self.active = False
+        gc.unfreeze()
+        if self._gc_was_enabled:
+            gc.enable()
+        self._collect()
+        if self.pinned:
+            os.sched_setaffinity(0, self._previous_affinity)
+            self.pinned = False
+        if self.priority_raised:
+            core.rush(False)
+            self.priority_raised = False
+
+
+class SessionPlan:
+    def __init__(self, seed:int, reps:int, fixed_order:bool, practice:list, blocks:list) -> None:
+        """
+        The full trial schedule of a session: the practice trials and the trials of every block,
+        generated up front from a seed so that the same schedule can be reproduced or replayed.
+        Each trial is a dictionary with the keys 'number' and 'font_size'.
+        Parameters:
+        seed (int): The seed the schedule was generated from.
+        reps (int): The number of repetitions per block.
+        fixed_order (bool): If True, the numbers are in a fixed sequence.
+        practice (list): The trials of the practice block.
+        blocks (list): A list with the trials of each block.
+        """
+
+        self.seed = seed
+        self.reps = reps
+        self.fixed_order = fixed_order
+        self.practice = practice
+        self.blocks = blocks
+
+    @staticmethod
+    def block_trials(rng:random.Random, reps:int, fixed_order:bool, practice:bool=False) -> list[dict]:
+        """
+        Generates the trials of one block in time linear in the number of trials.
+        In random order, each repetition is a shuffled copy of every number and font size combination.
+        In fixed order, the numbers are shown in sequence and each number cycles through the font sizes
+        in its own random order, with the same sequence used for every repetition.
+        Parameters:
+        rng (random.Random): The random number generator to use.
+        reps (int): The number of repetitions.
+        fixed_order (bool): If True, the numbers are in a fixed sequence.
+        practice (bool): If True, the reduced set of practice font sizes is used.
+        Returns:
+        list[dict]: The trials, each a dictionary with the keys 'number' and 'font_size'.
+        """
+
+        font_sizes = PRACTICE_FONT_SIZES if practice else FONT_SIZES
+        if fixed_order:
+            number_sizes = {}
+            for number in NUMBERS:
+                number_sizes[number] = list(font_sizes)
+                rng.shuffle(number_sizes[number])
+            sequence = [{'number': number, 'font_size': number_sizes[number][i]} for i in range(len(font_sizes)) for number in NUMBERS]
+            return [dict(trial) for _ in range(reps) for trial in sequence]
+
+        trials = []
+        for _ in range(reps):
+            rep_trials = [{'number': number, 'font_size': font_size} for number in NUMBERS for font_size in font_sizes]
+            rng.shuffle(rep_trials)
+            trials.extend(rep_trials)
+        return trials
+
+    @classmethod
+    def generate(cls, blocks:int, reps:int, fixed_order:bool=False, seed:int|None=None) -> 'SessionPlan':
+        """
+        Generates the schedule for a whole session.
+        Parameters:
+        blocks (int): The number of blocks.
+        reps (int): The number of repetitions per block.
+        fixed_order (bool): If True, the numbers are in a fixed sequence.
+        seed (int|None): The seed to generate the schedule from. If None, a random seed is chosen.
+        Returns:
+        SessionPlan: The generated plan.
+        """
+
+        if seed is None:
+            seed = random.SystemRandom().randrange(2**32)
+        rng = random.Random(seed)
+        practice = cls.block_trials(rng, reps, fixed_order, practice=True)
+        block_list = [cls.block_trials(rng, reps, fixed_order) for _ in range(blocks)]
+        return cls(seed, reps, fixed_order, practice, block_list)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the plan as a dictionary that can be written as JSON. Trials are stored as [number, font_size] pairs.
+        """
+
+        def pairs(trials):
+            return [[trial['number'], trial['font_size']] for trial in trials]
+
+        return {
+            'seed': self.seed,
+            'reps': self.reps,
+            'fixed_order': self.fixed_order,
+            'practice': pairs(self.practice),
+            'blocks': [pairs(trials) for trials in self.blocks],
+        }
+
+    @classmethod
+    def from_dict(cls, plan:dict) -> 'SessionPlan':
+        """
+        Creates a plan from a dictionary made by to_dict().
+        """
+
+        def trials(pairs):
+            return [{'number': number, 'font_size': font_size} for number, font_size in pairs]
 
-            if len(err_msg) > 0:
-                err_dlg = gui.Dlg(title="Error")
-                err_dlg.addText(err_msg)
-                err_dlg.show()
-                return Participant.open_info_dialogue(participant_number=participant_number, 
-                                                      gender=gender_index, 
-                                                      age=age, 
-                                                      year_of_study=year_index, 
-                                                      normal_vision=vision_index, 
-                                                      researcher_initials=researcher_initials)
-            
-            
+        return cls(plan['seed'], plan['reps'], plan['fixed_order'], trials(plan['practice']), [trials(block) for block in plan['blocks']])
 
+    def save(self, path:str|pathlib.Path) -> None:
+        """
+        Writes the plan to a JSON file.
+        """
 
-            participant = Participant(
-                number=participant_number,
-                gender=gender,
-                age=age,
-                year_of_study=year_of_study,
-                normal_vision=normal_vision,
-                researcher_initials=researcher_initials
-            )
+        with open(path, 'w', encoding='utf-8') as plan_file:
+            json.dump(self.to_dict(), plan_file)
 
-            return participant
-        else:
-            return None
+    @classmethod
+    def load(cls, path:str|pathlib.Path) -> 'SessionPlan':
+        """
+        Reads a plan from a JSON file written by save().
+        """
+
+        with open(path, 'r', encoding='utf-8') as plan_file:
+            return cls.from_dict(json.load(plan_file))
 
 
 class SART:
@@ -220,7 +1756,24 @@ class SART:
                    fixed_order:bool=False, 
                    output_dir:str="", 
                    monitor:str|None="testMonitor", 
-                   exit_key:str='escape') -> None:
+                   exit_key:str='escape',
+                   log_flush_every:int=1,
+                   frame_locked:bool=False,
+                   response_backend:str='event',
+                   seed:int|None=None,
+                   plan_file:str|None=None,
+                   output_format:str='xlsx',
+                   record_timing:bool=False,
+                   writer_queue_size:int=1000,
+                   writer_drain_secs:float=5.0,
+                   resume_file:str|None=None,
+                   rush_mode:bool=False,
+                   rush_cpu:int|None=None,
+                   anticipatory_rt_secs:float=0.1,
+                   warm_up_stimuli:bool=True,
+                   collector_address:str|None=None,
+                   station:str|None=None,
+                   output_layout:str='wide') -> None:
         """
         Initializes a new SART experiment.
         Parameters:
@@ -236,6 +1789,42 @@ class SART:
         output_dir (str): The directory to save the output file.
         monitor (str): The monitor to use.
         exit_key (str): The key to press to exit the experiment.
+        log_flush_every (int): How many trials are buffered before the streaming trial log is flushed. Defaults to 1 (every trial).
+        frame_locked (bool): If True, the stimulus and mask durations are converted to a whole number of screen refreshes
+                             (using the refresh rate measured when the window opens) and presentation is driven by counting flips
+                             instead of core.wait. The intended and achieved durations of each trial are added to the output.
+        response_backend (str): How key presses are collected during trials. 'event' uses the PsychoPy event queue,
+                                'keyboard' uses psychopy.hardware.keyboard for timestamps taken when the key is pressed.
+                                If the keyboard backend cannot be started, the event backend is used instead.
+        seed (int|None): The seed used to generate the trial schedule. If None, a random seed is chosen.
+        plan_file (str|None): A session plan saved from a previous run, to replay its exact trial schedule.
+                              The blocks, reps and fixed_order settings are then taken from the plan.
+        output_format (str): The default format of the output file: 'xlsx', 'parquet', 'feather' (Arrow IPC) or 'csv'.
+                             If a different known extension is chosen in the save dialog, that format is used instead.
+        record_timing (bool): If True, the onset, mask and offset flip times, the intended and achieved stimulus and mask durations,
+                              and the number of dropped frames of each trial are added to the output, and a timing quality
+                              summary is saved next to the output file.
+        writer_queue_size (int): The maximum number of trials waiting to be written to the trial log by the background writer.
+        writer_drain_secs (float): The maximum time to wait for the background writer to finish writing the trial log when the
+                                   experiment ends.
+        resume_file (str|None): A checkpoint file of an interrupted session to resume. If None, run() looks for checkpoints
+                                in output_dir and asks whether to resume one of them.
+        rush_mode (bool): If True, while the trials of a block run the process priority is raised (with core.rush) and
+                          automatic garbage collection is disabled during each trial; garbage is collected between trials,
+                          and the priority is lowered again between blocks and during message screens.
+        rush_cpu (int|None): In rush mode, a CPU to pin the process to while a block runs (where the OS supports it).
+        anticipatory_rt_secs (float): Responses faster than this are counted as anticipatory in the live statistics.
+        warm_up_stimuli (bool): If True, every stimulus and instruction screen is created and drawn to the back buffer
+                                while the introduction is shown, and the stimuli are drawn again before each block,
+                                so that their first trial is not slowed down by preparing them.
+        collector_address (str|None): The address ('host:port') of a collector service (see sart_collector.py) to stream
+                                      every trial to, in addition to the local files. If the collector cannot be reached,
+                                      the trials are saved to a fallback file next to the output file instead.
+        station (str|None): The name of this computer sent to the collector. Defaults to the host name.
+        output_layout (str): 'wide' writes one table with the participant details and number to omit repeated on every
+                             trial row. 'normalized' writes only the trial columns, with compact dtypes, to the output file,
+                             and the session values once to a '.session.json' file next to it. read_results() rebuilds
+                             the wide layout from a normalized file.
         """
 
 
@@ -258,22 +1847,67 @@ class SART:
         self.break_between_blocks_secs = self.break_between_blocks_secs - self.countdown_secs
 
         self.fixed_order = fixed_order
+        if plan_file is not None:
+            self.plan = SessionPlan.load(plan_file)
+            self.blocks = len(self.plan.blocks)
+            self.reps = self.plan.reps
+            self.fixed_order = self.plan.fixed_order
+        else:
+            self.plan = SessionPlan.generate(self.blocks, self.reps, self.fixed_order, seed=seed)
         self.show_practice = show_practice
         self.output_dir = output_dir
+        check_output_format(output_format)
+        self.output_format = output_format
         self.monitor = monitor
         self.participant:Participant = None
         self.window = None
+        self.stimuli:StimulusCache = None
+        self.countdown_bar:CountdownBar = None
+        self.countdown_stats = []
         self.output_file:pathlib.Path = None
         self.results_df:pd.DataFrame = None
-        self.columns = ['block', 'trial', 'number_shown', 'response_correct', 'response_time', 'last_four_avg']
-        self.results = {}
+        if response_backend not in ('event', 'keyboard'):
+            raise ValueError("The response backend must be 'event' or 'keyboard'")
+        self.response_backend = response_backend
+        self.responses = None
+        self.key_events = KeyEventLog(45*self.reps*self.blocks + len(self.plan.practice)) #About one press per trial
+        self.frame_locked = frame_locked
+        self.record_timing = record_timing
+        self.frame_rate:float = None
+        self.stimulus_visible_frames:int = None
+        self.stimulus_masked_frames:int = None
+        self.results = ResultsBuffer(45*self.reps*self.blocks, self.omit_number, extra_columns=self.get_extra_columns()) #45 trials per rep, multiplied by number of blocks
+        self.columns = self.results.columns
         self.exit_key = exit_key
-        for col in self.columns:
-            self.results[col] = []
-
-    def update_result(self, block_num:int, trial_num:int, number_shown:int, response_correct:bool, response_time:float|None, last_four_avg:float|None) -> None:
+        self.log_flush_every = log_flush_every
+        self.trial_log:TrialLog = None
+        self.writer:BackgroundWriter = None
+        self.writer_queue_size = writer_queue_size
+        self.writer_drain_secs = writer_drain_secs
+        self.resume_file = resume_file
+        self.completed_blocks = 0
+        self.attempt = 0
+        self.rush = RushMode(cpu=rush_cpu) if rush_mode else None
+        self.block_timing = []
+        self.anticipatory_rt_secs = anticipatory_rt_secs
+        self._session_stats = LiveStats(self.omit_number, anticipatory_rt_secs)
+        self._block_stats:dict[int, LiveStats] = {}
+        self.warm_up_stimuli = warm_up_stimuli
+        self.message_stims = {}
+        self.first_trial_draw = []
+        self.collector_address = collector_address
+        self.station = station or socket.gethostname()
+        self.collector:CollectorClient = None
+        self.owns_window = True
+        if output_layout not in ('wide', 'normalized'):
+            raise ValueError("The output layout must be 'wide' or 'normalized'")
+        self.output_layout = output_layout
+        self.run_timing = {}
+
+    def update_result(self, block_num:int, trial_num:int, number_shown:int, response_correct:bool, response_time:float|None, last_four_avg:float|None, **extra) -> None:
         """
-        Updates the results dictionary with the trial data.
+        Stores the trial data in the results buffer, updates the live block and session statistics, and queues it to be
+        appended to the streaming trial log by the background writer and sent to the collector (if used).
         Parameters:
         block_num (int): The block number.
         trial_num (int): The trial number.
@@ -281,32 +1915,451 @@ class SART:
         response_correct (bool): Indicates if the response was correct.
         response_time (float|None): The response time.
         last_four_avg (float|None): The average response time for the last four trials.
+        **extra: Values for any extra columns (e.g. the stimulus timing columns in frame locked mode).
+        """
+
+        self.results.append(block_num, trial_num, number_shown, response_correct, response_time, last_four_avg, **extra)
+        self._session_stats.update(number_shown, response_correct, response_time)
+        block_stats = self._block_stats.get(block_num)
+        if block_stats is None:
+            block_stats = self._block_stats[block_num] = LiveStats(self.omit_number, self.anticipatory_rt_secs)
+        block_stats.update(number_shown, response_correct, response_time)
+        if self.writer is not None or self.collector is not None:
+            row = [block_num, trial_num, number_shown, response_correct, response_time, last_four_avg]
+            for col in self.results.extra_columns:
+                row.append(extra.get(col))
+            if self.writer is not None:
+                self.writer.put(row)
+            if self.collector is not None:
+                self.collector.put(row)
+
+    def live_stats(self, block_number:int|None=None) -> dict:
+        """
+        Returns the live performance statistics recorded so far (see LiveStats.to_dict()).
+        Parameters:
+        block_number (int|None): The block to return the statistics of. If None, the statistics of the whole session are returned.
+        Returns:
+        dict: A copy of the statistics, which is not changed by later trials.
+        """
+
+        if block_number is None:
+            return self._session_stats.to_dict()
+        if block_number not in self._block_stats:
+            return LiveStats(self.omit_number, self.anticipatory_rt_secs).to_dict()
+        return self._block_stats[block_number].to_dict()
+
+    def get_stats_file_path(self) -> pathlib.Path:
+        """
+        Returns the path the live statistics are written to at the end of each block, which sits next to the output file
+        with a '.stats.jsonl' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.stats.jsonl')
+
+    def write_block_stats(self, block_number:int) -> None:
+        """
+        Prints the live statistics of a block, and appends them with the statistics of the session so far as a line of JSON
+        to the statistics file (if there is an output file).
+        Parameters:
+        block_number (int): The block that has just ended.
+        """
+
+        block_stats = self.live_stats(block_number)
+        session_stats = self.live_stats()
+
+        def describe(value, scale=1, unit=''):
+            return "n/a" if value is None else f"{value*scale:.1f}{unit}"
+
+        print(f"Block {block_number}: accuracy {describe(block_stats['accuracy'], 100, '%')}, "
+              f"{block_stats['commission_errors']} commission and {block_stats['omission_errors']} omission errors, "
+              f"RT {describe(block_stats['rt_mean'], 1000, ' ms')} mean, {describe(block_stats['rt_sd'], 1000, ' ms')} SD, "
+              f"{describe(block_stats['anticipatory_fraction'], 100, '%')} anticipatory")
+        if self.output_file:
+            with open(self.get_stats_file_path(), 'a', encoding='utf-8') as stats_file:
+                stats_file.write(json.dumps({'block': block_number, 'block_stats': block_stats, 'session_stats': session_stats}) + "\n")
+
+    def get_events_file_path(self) -> pathlib.Path:
+        """
+        Returns the path the key event log is saved to, which sits next to the output file with an 'events_' prefix
+        in the same output format (e.g. events_SART_12.xlsx), so that it does not match the SART_* output file patterns.
+        """
+
+        output_file = pathlib.Path(self.output_file)
+        return output_file.with_name('events_' + output_file.stem + OUTPUT_FORMATS[self.output_format]['suffix'])
+
+    def get_events_checkpoint_file_path(self) -> pathlib.Path:
+        """
+        Returns the path the key event log is saved to with each checkpoint, which sits next to the output file with an '.events.npz' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.events.npz')
+
+    def get_log_file_path(self) -> pathlib.Path:
+        """
+        Returns the path of the streaming trial log, which sits next to the output file with a '.log.csv' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.log.csv')
+
+    def get_plan_file_path(self) -> pathlib.Path:
+        """
+        Returns the path the session plan is saved to, which sits next to the output file with a '.plan.json' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.plan.json')
+
+    def get_extra_columns(self) -> dict:
+        """
+        Returns the extra result columns (name to NumPy dtype) for the timing settings: the flip times and dropped frames
+        if timing is recorded, and the intended and achieved durations if timing is recorded or presentation is frame locked.
+        """
+
+        extra_columns = {}
+        if self.record_timing:
+            for col in ['onset_time', 'mask_time', 'offset_time']:
+                extra_columns[col] = np.float64
+        if self.frame_locked or self.record_timing:
+            for col in ['stimulus_intended_secs', 'stimulus_achieved_secs', 'mask_intended_secs', 'mask_achieved_secs']:
+                extra_columns[col] = np.float64
+        if self.record_timing:
+            extra_columns['dropped_frames'] = np.int16
+        return extra_columns
+
+    def get_checkpoint_file_path(self) -> pathlib.Path:
+        """
+        Returns the path of the session checkpoint, which sits next to the output file with a '.checkpoint.json' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.checkpoint.json')
+
+    def write_checkpoint(self) -> None:
+        """
+        Saves what is needed to resume the session at the next block: the participant information, the settings
+        (including the timing settings, output layout and result columns), the number of completed blocks, the attempt number, the state of the random number generator, and the paths of the session plan
+        and the trial log (which holds the completed results, one row per trial). The key event log is saved next to it.
+        The file is written to a temporary file first and then renamed, so a crash while writing cannot corrupt it.
+        Does nothing if there is no output file.
+        """
+
+        if not self.output_file:
+            return
+        random_state = random.getstate()
+        checkpoint = {
+            'participant': vars(self.participant),
+            'omit_number': self.omit_number,
+            'completed_blocks': self.completed_blocks,
+            'attempt': self.attempt,
+            'blocks': self.blocks,
+            'reps': self.reps,
+            'output_file': str(self.output_file),
+            'output_format': self.output_format,
+            'output_layout': self.output_layout,
+            'record_timing': self.record_timing,
+            'frame_locked': self.frame_locked,
+            'extra_columns': {col: np.dtype(self.results._data[col].dtype).str for col in self.results.extra_columns},
+            'plan_file': str(self.get_plan_file_path()),
+            'log_file': str(self.get_log_file_path()),
+            'events_file': str(self.get_events_checkpoint_file_path()),
+            'random_state': [random_state[0], list(random_state[1]), random_state[2]],
+        }
+        self.key_events.save(self.get_events_checkpoint_file_path())
+        checkpoint_path = self.get_checkpoint_file_path()
+        temp_path = checkpoint_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as checkpoint_file:
+            json.dump(checkpoint, checkpoint_file)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temp_path, checkpoint_path)
+
+    def load_checkpoint(self, path:str|pathlib.Path) -> None:
+        """
+        Restores an interrupted session from a checkpoint written by write_checkpoint().
+        The results of the completed blocks are read back from the trial log, and their key presses from the saved key
+        event log. Trials of the block that was interrupted are not restored; that block will be run again from the start. The previous log is kept,
+        renamed with the attempt number and an '.interrupted.csv' suffix (e.g. SART_12.log.1.interrupted.csv, then SART_12.log.2.interrupted.csv
+        if the resumed session is interrupted again), and a new log is started with the restored trials.
+        The settings saved in the checkpoint (timing, output layout and result columns) replace those of this SART.
+        The live statistics are rebuilt from the restored trials.
+        Parameters:
+        path (str|pathlib.Path): The checkpoint file.
+        """
+
+        with open(path, 'r', encoding='utf-8') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file)
+
+        self.participant = Participant(**checkpoint['participant'])
+        self.omit_number = checkpoint['omit_number']
+        self.output_file = checkpoint['output_file']
+        self.output_format = checkpoint['output_format']
+        self.completed_blocks = checkpoint['completed_blocks']
+        self.plan = SessionPlan.load(checkpoint['plan_file'])
+        self.blocks = len(self.plan.blocks)
+        self.reps = self.plan.reps
+        self.fixed_order = self.plan.fixed_order
+        random_state = checkpoint['random_state']
+        random.setstate((random_state[0], tuple(random_state[1]), random_state[2]))
+
+        self.output_layout = checkpoint.get('output_layout', self.output_layout)
+        self.record_timing = checkpoint.get('record_timing', self.record_timing)
+        self.frame_locked = checkpoint.get('frame_locked', self.frame_locked)
+        self.attempt = checkpoint.get('attempt', 0) + 1
+        if 'extra_columns' in checkpoint:
+            #The saved columns are used rather than get_extra_columns(), as frame locking may have been turned off when the refresh rate was measured
+            extra_columns = {col: np.dtype(dtype) for col, dtype in checkpoint['extra_columns'].items()}
+        else:
+            extra_columns = self.get_extra_columns()
+        self.results = ResultsBuffer(45*self.reps*self.blocks, self.omit_number, extra_columns=extra_columns)
+        self.columns = self.results.columns
+        self._session_stats = LiveStats(self.omit_number, self.anticipatory_rt_secs)
+        self._block_stats = {}
+        log_path = pathlib.Path(checkpoint['log_file'])
+        _, logged = TrialLog.read(log_path)
+        logged = logged[logged['block'] <= self.completed_blocks]
+        events_path = pathlib.Path(checkpoint.get('events_file', self.get_events_checkpoint_file_path()))
+        if events_path.exists():
+            key_events = KeyEventLog.load(events_path)
+            self.key_events = key_events.select(key_events['block'] <= self.completed_blocks)
+        interrupted_path = log_path.with_suffix(f'.{self.attempt}.interrupted.csv')
+        os.replace(log_path, interrupted_path)
+        print(f"Resuming participant {self.participant.number} after block {self.completed_blocks} of {self.blocks}. "
+              f"Previous trial log kept as {interrupted_path}")
+
+        self.open_trial_log()
+        for row in logged.itertuples(index=False):
+            values = {col: (None if pd.isna(value) else value) for col, value in zip(logged.columns, row)}
+            self.update_result(block_num=int(values.pop('block')), trial_num=int(values.pop('trial')), number_shown=int(values.pop('number_shown')),
+                               response_correct=bool(values.pop('response_correct')), response_time=values.pop('response_time'),
+                               last_four_avg=values.pop('last_four_avg'), **{col: values[col] for col in self.results.extra_columns if col in values})
+
+    def find_checkpoints(self) -> list[pathlib.Path]:
+        """
+        Returns the checkpoint files of interrupted sessions in the output directory, newest first.
+        """
+
+        checkpoints = pathlib.Path(self.output_dir or '.').glob('*.checkpoint.json')
+        return sorted(checkpoints, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def choose_checkpoint(self) -> pathlib.Path|None:
+        """
+        If there are checkpoints of interrupted sessions in the output directory, opens a dialog asking whether to resume one.
+        Returns:
+        pathlib.Path|None: The checkpoint to resume, or None to start a new session.
+        """
+
+        checkpoints = self.find_checkpoints()
+        if len(checkpoints) == 0:
+            return None
+        choices = ["Start a new session"]
+        for path in checkpoints:
+            with open(path, 'r', encoding='utf-8') as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            choices.append(f"Resume participant {checkpoint['participant']['number']} "
+                           f"(completed {checkpoint['completed_blocks']} of {checkpoint['blocks']} blocks) - {path.name}")
+        resume_dlg = gui.Dlg(title="SART")
+        resume_dlg.addText('Interrupted sessions were found').setStyleSheet("font-weight: bold; font-size: 16px")
+        session_field = resume_dlg.addField('session', choices[0], choices=choices, label='Session:')
+        resume_dlg.show()
+        if not resume_dlg.OK or session_field.currentIndex() == 0:
+            return None
+        return checkpoints[session_field.currentIndex() - 1]
+
+    def get_timing_file_path(self) -> pathlib.Path:
+        """
+        Returns the path the timing quality summary is saved to, which sits next to the output file with a '.timing.json' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.timing.json')
+
+    def get_frame_period(self) -> float:
+        """
+        Returns the duration of one screen refresh in seconds: the measured one if available, otherwise the
+        window's nominal frame period, or 1/60 if there is no window.
+        """
+
+        if self.frame_rate:
+            return 1/self.frame_rate
+        if self.window is not None:
+            return self.window.monitorFramePeriod
+        return 1/60
+
+    def timing_summary(self) -> dict|None:
+        """
+        Summarises how closely the intended stimulus and mask durations were achieved.
+        Overrun is the achieved minus the intended duration (negative if a phase was cut short).
+        Returns:
+        dict|None: The number of trials, the frame period, the mean and maximum stimulus and mask overrun in seconds,
+        the percentage of trials where either phase was more than one frame off, the total number of dropped frames
+        (if recorded), whether rush mode was on, the frame interval jitter of each block (if recorded), the time taken
+        to draw the stimulus of the first trial of each block, and the drawing times measured by each stimulus warm-up.
+        None if no timing columns are recorded.
+        """
+
+        if 'stimulus_achieved_secs' not in self.results.columns or len(self.results) == 0:
+            return None
+        frame_period = self.get_frame_period()
+        stimulus_overrun = self.results['stimulus_achieved_secs'] - self.results['stimulus_intended_secs']
+        mask_overrun = self.results['mask_achieved_secs'] - self.results['mask_intended_secs']
+        outside_one_frame = (np.abs(stimulus_overrun) > frame_period) | (np.abs(mask_overrun) > frame_period)
+        summary = {
+            'trials': len(self.results),
+            'frame_period_secs': frame_period,
+            'stimulus_overrun_mean_secs': float(np.nanmean(stimulus_overrun)),
+            'stimulus_overrun_max_secs': float(np.nanmax(stimulus_overrun)),
+            'mask_overrun_mean_secs': float(np.nanmean(mask_overrun)),
+            'mask_overrun_max_secs': float(np.nanmax(mask_overrun)),
+            'percent_trials_outside_one_frame': float(100 * np.mean(outside_one_frame)),
+        }
+        if 'dropped_frames' in self.results.columns:
+            summary['dropped_frames'] = int(self.results['dropped_frames'].sum())
+        summary['rush_mode'] = self.rush is not None
+        summary['first_trial_draw'] = self.first_trial_draw
+        if self.stimuli is not None and self.stimuli.warm_up_stats:
+            summary['warm_up'] = self.stimuli.warm_up_stats
+        task_blocks = [block for block in self.block_timing if not block['practice']]
+        if task_blocks:
+            summary['frame_interval_sd_secs'] = float(np.mean([block['frame_interval_sd_secs'] for block in task_blocks]))
+            summary['frame_interval_max_secs'] = float(max(block['frame_interval_max_secs'] for block in task_blocks))
+            summary['blocks'] = self.block_timing
+        return summary
+
+    def open_trial_log(self) -> None:
+        """
+        Opens the streaming trial log for the session, and starts the background writer that appends each
+        recorded trial to it. Writes are paused while the stimulus is shown, so they happen during the mask
+        or between blocks. Does nothing if there is no output file.
+        """
+
+        if not self.output_file:
+            return
+        metadata = {
+            'participant_number': self.participant.number,
+            'gender': self.participant.gender,
+            'age': self.participant.age,
+            'year_of_study': self.participant.year_of_study,
+            'normal_vision': self.participant.normal_vision,
+            'researcher_initials': self.participant.researcher_initials,
+            'number_to_omit': self.omit_number,
+            'blocks': self.blocks,
+            'reps': self.reps,
+            'seed': self.plan.seed,
+        }
+        self.trial_log = TrialLog(self.get_log_file_path(), self.columns, metadata=metadata, flush_every=self.log_flush_every)
+        self.writer = BackgroundWriter(self.trial_log, max_queue_size=self.writer_queue_size)
+
+    def get_collector_fallback_path(self) -> pathlib.Path:
+        """
+        Returns the path trials are saved to if the collector cannot be reached, which sits next to the output file
+        with a '.collector.jsonl' suffix.
+        """
+
+        return pathlib.Path(self.output_file).with_suffix('.collector.jsonl')
+
+    def open_collector(self) -> None:
+        """
+        Starts the client that streams each recorded trial to the collector service.
+        Does nothing if no collector address was given or there is no output file.
+        """
+
+        if not self.collector_address or not self.output_file:
+            return
+        metadata = {
+            'participant_number': self.participant.number,
+            'gender': self.participant.gender,
+            'age': self.participant.age,
+            'year_of_study': self.participant.year_of_study,
+            'normal_vision': self.participant.normal_vision,
+            'researcher_initials': self.participant.researcher_initials,
+            'number_to_omit': self.omit_number,
+            'blocks': self.blocks,
+            'reps': self.reps,
+            'seed': self.plan.seed,
+            'output_file': str(self.output_file),
+            'attempt': self.attempt,
+            'resumed_after_block': self.completed_blocks,
+        }
+        self.collector = CollectorClient(self.collector_address, self.station, self.get_collector_session(), self.columns, metadata,
+                                         self.get_collector_fallback_path())
+
+    def get_collector_session(self) -> str:
+        """
+        Returns the identifier the session is sent to the collector under: the station, the output file name, the seed and
+        the attempt number. A resumed session (see load_checkpoint()) is a new attempt, so the trials of the block it runs
+        again are stored as new trials instead of being dropped as duplicates of the interrupted attempt.
         """
 
-        self.results['block'].append(block_num)
-        self.results['trial'].append(trial_num)
-        self.results['number_shown'].append(number_shown)
-        self.results['response_correct'].append(response_correct)
-        self.results['response_time'].append(response_time)
-        self.results['last_four_avg'].append(last_four_avg)
+        return f"{self.station}-{pathlib.Path(self.output_file).stem}-{self.plan.seed}-{self.attempt}"
 
     def get_output_file_path(self, initial_dir:str=""):
         """
         Generates the output file path for saving SART data.
+        The save dialog offers every output format, with the format chosen in the constructor first.
+        If the chosen file name has the extension of another known format, self.output_format is changed to that format
+        (unless the package it needs is not installed); if it has no known extension, the extension of the current format is added.
         Args:
             initial_dir (str): The initial directory to open the file save dialog. Defaults to an empty string.
         Returns:
             str: The full path of the file where the SART data will be saved.
         """
 
-        filename = f"SART_{self.participant.number}.xlsx"
-        filename = gui.fileSaveDlg(initial_dir, filename, allowed="Excel Worksheet (*.xlsx)|*.xlsx)", prompt="Save SART Data As:")
-
+        suffix = OUTPUT_FORMATS[self.output_format]['suffix']
+        file_filters = [OUTPUT_FORMATS[self.output_format]['file_filter']]
+        for output_format, info in OUTPUT_FORMATS.items():
+            if output_format != self.output_format:
+                file_filters.append(info['file_filter'])
+        filename = f"SART_{self.participant.number}{suffix}"
+        filename = gui.fileSaveDlg(initial_dir, filename, allowed=";;".join(file_filters), prompt="Save SART Data As:")
+
+        if filename:
+            chosen_format = output_format_for_path(filename)
+            if chosen_format is None:
+                filename = f"{filename}{suffix}"
+            elif chosen_format != self.output_format:
+                try:
+                    check_output_format(chosen_format)
+                    self.output_format = chosen_format
+                except ImportError as e:
+                    print(f"{e}. Saving as {self.output_format} instead.")
+                    filename = str(pathlib.Path(filename).with_suffix(suffix))
         return filename
 
+    def build_results_dataframe(self) -> pd.DataFrame:
+        """
+        Converts the results buffer to a pandas DataFrame in the output file layout.
+        Participant information, the number to omit and whether the experiment was completed are
+        added as columns, and the columns are put in the output order (any extra columns come last).
+        Returns:
+        pd.DataFrame: The results, one row per trial.
+        """
+
+        return wide_results(self.results.to_numpy(), self.session_table())
+
+    def session_table(self) -> dict:
+        """
+        Returns the values that are the same for every trial of the session: the participant details, whether the
+        experiment was completed and the number to omit, followed by the blocks, reps and seed of the session and the
+        number of trials recorded.
+        """
+
+        n_trials = len(self.results)
+        length_if_complete = 45*self.reps*self.blocks #45 trials per rep, multiplied by number of blocks
+        return {
+            'participant_number': self.participant.number,
+            'gender': self.participant.gender,
+            'age': self.participant.age,
+            'year_of_study': self.participant.year_of_study,
+            'normal_vision': self.participant.normal_vision,
+            'researcher_initials': self.participant.researcher_initials,
+            'experiment_completed': n_trials < length_if_complete,
+            'number_to_omit': self.omit_number,
+            'blocks': self.blocks,
+            'reps': self.reps,
+            'seed': self.plan.seed,
+            'n_trials': n_trials,
+        }
+
     def save_and_quit(self):
         """
-        Save the experiment results to an Excel file and quits the application.
+        Save the experiment results to the output file (in the chosen output format) and quits the application.
         If no trials have been completed, the application will quit without saving any data.
         If fewer trials than the expected number of trials (given the blocks and reps settings) have been completed, the application will save the data and indicate that it is incomplete.
         Parameters:
@@ -314,47 +2367,113 @@ class SART:
         This function performs the following steps:
         1. Checks the number of trials completed.
         2. If there are any trials completed, it calculates the expected number of trials if the experiment is complete.
-        3. Converts the results dictionary to a pandas DataFrame.
-        4. Adds participant information to the DataFrame.
-        5. Adds a column indicating whether the experiment was completed.
-        6. Reorders the columns in the DataFrame.
-        7. Saves the DataFrame to an Excel file with the specified output file path.
-        8. Prints a message indicating the data has been saved and the number of trials completed.
-        9. Closes the experiment window if it exists.
-        10. Quits the core application.
+        3. Waits (at most writer_drain_secs) for the background writer to finish and close the streaming trial log.
+        4. Builds the results DataFrame (results_df) with build_results_dataframe() and saves it to the output file path with write_results().
+        5. For the xlsx format, the rows are instead streamed from the results buffer to the file with write_xlsx() (results_df is still built).
+        6. Saves every key press of the session (the key event log) next to the output file, in the same format.
+        7. Prints a message indicating the data has been saved and the number of trials completed.
+        8. Closes the experiment window if it exists.
+        9. Quits the core application.
+        If the SART does not own its window (owns_window is False, as when run by a SessionOrchestrator), the window
+        is left open and SessionEnded is raised instead of quitting.
         """
 
-        n_trials = len(self.results['number_shown'])
+        if self.rush is not None:
+            self.rush.exit()
+        if self.collector is not None:
+            self.collector.close(self.writer_drain_secs)
+            stats = self.collector.stats()
+            print(f"Collector: {stats['rows_sent']} rows sent in {stats['batches']} batches, {stats['retries']} retries"
+                  + (f", {stats['rows_spooled']} rows saved to {self.collector.fallback_path}" if stats['rows_spooled'] else ""))
+        if self.writer is not None:
+            self.writer.close(self.writer_drain_secs)
+            stats = self.writer.stats()
+            print(f"Trial log writer: {stats['rows_written']} rows in {stats['batches']} batches, max queue depth {stats['max_queue_depth']}, "
+                  f"flush {stats['flush_secs_mean']*1000:.2f} ms mean, {stats['flush_secs_max']*1000:.2f} ms max")
+        n_trials = len(self.results)
         if n_trials > 0:
-            length_if_complete = 45*self.reps*self.blocks #45 trials per rep, multiplied by number of blocks
-
-            self.results_df = pd.DataFrame(self.results)
-            self.results_df['participant_number'] = self.participant.number
-            self.results_df['gender'] = self.participant.gender
-            self.results_df['age'] = self.participant.age
-            self.results_df['year_of_study'] = self.participant.year_of_study
-            self.results_df['normal_vision'] = self.participant.normal_vision
-            self.results_df['researcher_initials'] = self.participant.researcher_initials
-            self.results_df['experiment_completed'] = n_trials < length_if_complete
-            self.results_df['number_to_omit'] = self.omit_number
-
-            #Reorder columns
-            column_order = ['participant_number', 'gender', 'age', 'year_of_study', 'normal_vision', 'researcher_initials', 'experiment_completed', 'block', 'trial', 'number_to_omit', 'number_shown', 'response_correct', 'response_time', 'last_four_avg']
-            self.results_df = self.results_df[column_order]
-            self.results_df.to_excel(self.output_file, freeze_panes=(1, 0), index=False)
+            self.results_df = self.results.to_dataframe() if self.output_layout == 'normalized' else self.build_results_dataframe()
+            if self.output_format == 'xlsx':
+                #Streamed from the results buffer, as DataFrame.to_excel() builds every cell of the workbook in memory first
+                write_xlsx(self.results, self.output_file, None if self.output_layout == 'normalized' else self.session_table())
+            else:
+                write_results(self.results_df, self.output_file, self.output_format)
+            if self.output_layout == 'normalized':
+                session_path = write_session(self.output_file, self.session_table())
+                print(f"Session table saved to {session_path}")
             print(f"Data saved to {self.output_file}")
+            write_results(self.key_events.to_dataframe(), self.get_events_file_path(), self.output_format)
+            print(f"Key presses ({len(self.key_events)}) saved to {self.get_events_file_path()}")
+            if self.trial_log is not None:
+                print(f"Trial log saved to {self.trial_log.path}")
             print("Number of trials completed: ", n_trials)
+            timing = self.timing_summary()
+            if timing is not None:
+                if self.output_file:
+                    with open(self.get_timing_file_path(), 'w', encoding='utf-8') as timing_file:
+                        json.dump(timing, timing_file, indent=2)
+                print(f"Timing: stimulus overrun {timing['stimulus_overrun_mean_secs']*1000:.2f} ms mean, "
+                      f"{timing['stimulus_overrun_max_secs']*1000:.2f} ms max; mask overrun {timing['mask_overrun_mean_secs']*1000:.2f} ms mean, "
+                      f"{timing['mask_overrun_max_secs']*1000:.2f} ms max; {timing['percent_trials_outside_one_frame']:.1f}% of trials more than one frame off")
+                if 'frame_interval_sd_secs' in timing:
+                    print(f"Frame interval jitter (rush mode {'on' if timing['rush_mode'] else 'off'}): {timing['frame_interval_sd_secs']*1000:.2f} ms SD, "
+                          f"{timing['frame_interval_max_secs']*1000:.2f} ms max")
+        if self.stimuli is not None:
+            stats = self.stimuli.stats()
+            print(f"Stimulus cache: {stats['size']} number stimuli, {stats['hits']} hits, {stats['misses']} misses, "
+                  f"{stats['build_secs']*1000:.1f} ms building")
+        for first_draw in self.first_trial_draw:
+            print(f"First trial of {'practice' if first_draw['practice'] else 'block ' + str(first_draw['block'])}: "
+                  f"{first_draw['draw_secs']*1000:.2f} ms drawing the stimulus ({'after' if first_draw['warmed_up'] else 'without'} warm-up)")
+        if self.rush is not None:
+            stats = self.rush.stats
+            print(f"Rush mode: {stats['blocks']} blocks, {stats['collected_objects']} objects collected between trials and blocks, "
+                  f"collection {stats['collect_secs_total']*1000:.1f} ms total, {stats['collect_secs_max']*1000:.1f} ms max, "
+                  f"{stats['trial_collect_secs_max']*1000:.2f} ms max between trials")
+        for i, stats in enumerate(self.countdown_stats):
+            print(f"Countdown {i+1}: {stats['frames']} frames, {stats['dropped_frames']} dropped, "
+                  f"{stats['cpu_secs']:.2f}s CPU over {stats['wall_secs']:.2f}s")
+        if not self.owns_window:
+            raise SessionEnded()
         if self.window is not None:
             self.window.close()
         core.quit()
         
 
-    def show_message(self, message:str, key:str='b'):
+    def get_message_stim(self, message:str) -> visual.TextStim:
+        """
+        Returns the stimulus for an instruction screen, creating it (and laying out its text) the first time it is needed.
+        """
+
+        message_stim = self.message_stims.get(message)
+        if message_stim is None:
+            message_stim = self.message_stims[message] = visual.TextStim(self.window, text=message, color="white", height=0.7)
+        return message_stim
+
+    def warm_up(self) -> None:
+        """
+        Builds the stimulus cache and the stimuli of every instruction screen, and draws them all to the back buffer
+        (which is then cleared), so that none of them has to be prepared when it is first shown.
+        Called while the introduction is shown, so it does not delay anything the participant sees.
+        """
+
+        for message in [self.get_practice_message(), self.get_task_start_message()]:
+            self.get_message_stim(message).draw()
+        if self.stimuli is None:
+            self.stimuli = StimulusCache(self.window)
+            self.stimuli.build()
+        stats = self.stimuli.warm_up()
+        print(f"Warm-up: first draw of every stimulus {stats['first_pass_secs']*1000:.1f} ms "
+              f"(slowest {stats['first_pass_max_draw_secs']*1000:.1f} ms), second draw {stats['second_pass_secs']*1000:.1f} ms "
+              f"(slowest {stats['second_pass_max_draw_secs']*1000:.1f} ms)")
+
+    def show_message(self, message:str, key:str='b', while_waiting=None):
         """
         Displays a message on the screen and waits for a specific key press to continue.
         Parameters:
         message (str): The message to be displayed on the screen.
         key (str): The key that the user must press to continue. Default is 'b'.
+        while_waiting (callable|None): A function to call after the message is shown, before waiting for the key press.
         Behavior:
         - Displays the provided message in white color with a height of 0.7.
         - Waits for the user to press the specified key or the exit key.
@@ -365,9 +2484,11 @@ class SART:
         - All events are cleared before waiting for the key press.
         """
 
-        message_screen = visual.TextStim(self.window, text=message, color="white", height=0.7)
+        message_screen = self.get_message_stim(message)
         message_screen.draw()
         self.window.flip()
+        if while_waiting is not None:
+            while_waiting()
 
         event.clearEvents()
         response = False
@@ -386,6 +2507,13 @@ class SART:
         
 
     def show_intro_message(self):
+        """
+        Shows the introduction. If warm_up_stimuli is True, the warm-up runs while it is shown.
+        """
+
+        self.show_message(self.get_intro_message(), while_waiting=self.warm_up if self.warm_up_stimuli else None)
+
+    def get_intro_message(self) -> str:
         initial_message = ("In this task, a series of numbers will"
                                       " be presented to you.  For every"
                                       " number that appears except for the"
@@ -401,10 +2529,12 @@ class SART:
                                       " accuracy and speed while doing this"
                                       " task.\n\nPress Esc to exit at any point\n\n"
                                       "Press the b key when you are ready to start.")
-        
-        self.show_message(initial_message)
+        return initial_message
         
     def show_practice_message(self):
+        self.show_message(self.get_practice_message())
+
+    def get_practice_message(self) -> str:
         practice_message = ("We will now do some practice trials "
                                       "to familiarize you with the task.\n"
                                       "\nRemember, press the space bar when"
@@ -414,10 +2544,12 @@ class SART:
                                       "practice.")
         if self.countdown:
             practice_message += f"\n\nA countdown bar will be displayed from {self.countdown_secs} seconds before the start."
-        
-        self.show_message(practice_message)
+        return practice_message
 
     def show_task_start_message(self):
+        self.show_message(self.get_task_start_message())
+
+    def get_task_start_message(self) -> str:
         start_message = ("We will now start the task.\n"
                                       "\nRemember, give equal importance to"
                                       " both accuracy and speed while doing"
@@ -425,8 +2557,7 @@ class SART:
                                       "begin.")
         if self.countdown:
             start_message += f"\n\nA countdown bar will be displayed from {self.countdown_secs} seconds before the start of each block."
-        
-        self.show_message(start_message)
+        return start_message
 
     def create_trial_list(self, practice=False)->data.TrialHandler:
         """
@@ -439,100 +2570,199 @@ class SART:
         For each item in the trial list, the parameters are a dictionary with the following keys
         - number: The number to display in the trial.
         - font_size: The font size to use for the number.
+        The session itself uses the trials in self.plan, which are generated in the same way when the SART is created.
         """
 
-        numbers = [1, 2, 3, 4, 5, 6, 7, 8, 9]
-        font_sizes=[1.20, 1.80, 2.35, 2.50, 3.00]
-        if practice:
-            font_sizes=[1.20, 3.00]
-        
-        trial_list = data.createFactorialTrialList({
-                                                    "number": numbers,
-                                                    "font_size": font_sizes
-                                                    })
-        if self.fixed_order:
-
-            seq_list = []
-            for i in range(len(font_sizes)):
-                for number in numbers:
-                    random.shuffle(trial_list)
-                    for trial in trial_list:
-                        if trial["number"] == number and trial not in seq_list:
-                            seq_list.append(trial)
-                            break
-            
-            return data.TrialHandler(seq_list, nReps=self.reps, method='sequential')
-            
-        
-        else:
-            return data.TrialHandler(trial_list, nReps=self.reps, method='random')
-        
-
-
+        trials = SessionPlan.block_trials(random, self.reps, self.fixed_order, practice=practice)
+        return data.TrialHandler(trials, nReps=1, method='sequential')
 
     def run(self):
         """
         Executes the main experiment workflow.
-        This method performs the following steps:
+        If a checkpoint of an interrupted session is given (resume_file) or chosen in the resume dialog, the session is
+        restored from it and continues from the block after the last completed one, without the practice block.
+        Otherwise, this method performs the following steps:
         1. Opens a dialogue box to collect participant information and creates a Participant object.
            If the participant information is not provided, the method saves the current state and exits.
-        2. Determines the output file path for saving results.
-        3. Initializes a full-screen window for displaying visual stimuli.
+        2. Determines the output file path for saving results, and saves the session plan (trial schedule and seed) next to it.
+        3. Initializes a full-screen window for displaying visual stimuli (unless a window has already been given).
         4. Displays an introductory message to the participant.
         5. If practice trials are enabled, shows a practice message and runs a practice block.
         6. Displays a message indicating the start of the main task.
-        7. Iterates through the specified number of blocks, running each block in sequence.
-        8. Saves the results and exits the experiment.
+        7. Iterates through the specified number of blocks, running each block in sequence and writing a checkpoint after each one.
+        8. Saves the results, removes the checkpoint and exits the experiment.
         Returns:
             None
         """
         
         
-        self.participant = Participant.open_info_dialogue() #Open the dialogue box to collect participant information and create a participant object when OK is pressed
-        if self.participant is None:
-            self.save_and_quit()
-        self.output_file = self.get_output_file_path(self.output_dir)
-        
-        self.window = visual.Window(size=(1920,1080),
-                            fullscr=True,
-                            color="black",
-                            units='cm',
-                monitor=self.monitor)
+        start_time = core.getTime()
+        resume_file = self.resume_file or self.choose_checkpoint()
+        if resume_file is not None:
+            self.load_checkpoint(resume_file)
+        else:
+            self.participant = Participant.open_info_dialogue() #Open the dialogue box to collect participant information and create a participant object when OK is pressed
+            if self.participant is None:
+                self.save_and_quit()
+            self.output_file = self.get_output_file_path(self.output_dir)
+            if self.output_file:
+                self.plan.save(self.get_plan_file_path())
+            self.open_trial_log()
+            self.write_checkpoint()
+        self.open_collector()
+        dialogs_done_time = core.getTime()
+
+        self.open_window()
+        if self.responses is None:
+            self.open_response_backend()
+        self.run_timing = {'dialog_secs': dialogs_done_time - start_time, 'setup_secs': core.getTime() - dialogs_done_time}
         self.show_intro_message()
 
-        if self.show_practice:
+        if self.show_practice and resume_file is None:
             self.show_practice_message()
             self.block(practice=True)
 
         self.show_task_start_message()
 
-        for block_n in range(self.blocks):
+        for block_n in range(self.completed_blocks, self.blocks):
             self.block(block_number=block_n+1)
-        
+            self.completed_blocks = block_n+1
+            self.write_checkpoint()
+
+        if self.output_file:
+            self.get_checkpoint_file_path().unlink(missing_ok=True)
+            self.get_events_checkpoint_file_path().unlink(missing_ok=True)
         self.save_and_quit()
 
 
+    def open_window(self) -> None:
+        """
+        Opens the full-screen window, unless one has already been given (e.g. by a SessionOrchestrator), and prepares
+        it for frame locked presentation and timing recording. The refresh rate is only measured if it is not known yet.
+        """
+
+        if self.window is None:
+            self.window = visual.Window(size=(1920,1080),
+                                fullscr=True,
+                                color="black",
+                                units='cm',
+                    monitor=self.monitor)
+        if self.frame_locked or self.record_timing:
+            if self.frame_rate is None:
+                self.measure_frame_rate()
+            else:
+                self.set_frame_rate(self.frame_rate)
+        if self.record_timing:
+            self.window.refreshThreshold = 1.5 * self.get_frame_period()
+        self.window.recordFrameIntervals = self.record_timing
+
+    def open_response_backend(self) -> None:
+        """
+        Creates the backend used to collect responses during trials, as chosen by the response_backend parameter.
+        If the keyboard backend cannot be created (e.g. psychtoolbox is not installed), the event backend is used.
+        """
+
+        if self.response_backend == 'keyboard':
+            try:
+                self.responses = KeyboardResponseBackend()
+                return
+            except Exception as e:
+                print(f"Could not start the keyboard response backend ({e}). Using the event backend instead.")
+                self.response_backend = 'event'
+        self.responses = EventResponseBackend()
+
+    def collect_presses(self, block_number:int, trial_number:int, mask_time:float|None=None, phase:str|None=None) -> list[tuple[str, float]]:
+        """
+        Collects every key press made since the last call and adds it to the key event log, quitting if the exit key was pressed.
+        Parameters:
+        block_number (int): The block number (0 for the practice block).
+        trial_number (int): The trial number within the block.
+        mask_time (float|None): The time the mask was shown. Presses before it are logged in the stimulus phase, and later ones in the mask phase.
+                                With the event backend, presses are timestamped when the events are pumped, so a press shortly before
+                                the mask may be logged in the mask phase.
+        phase (str|None): The phase all of the presses are logged in (e.g. 'feedback'), instead of using mask_time.
+        Returns:
+        list[tuple[str, float]]: The (key, time) tuples of the space presses.
+        """
+
+        presses = self.responses.get_presses(None, self.clock)
+        for key, time in presses:
+            self.key_events.append(block_number, trial_number, phase or ('stimulus' if time < mask_time else 'mask'), key, time)
+        if any(key == self.exit_key for key, _ in presses):
+            self.save_and_quit()
+        return [(key, time) for key, time in presses if key == 'space']
+
+    def measure_frame_rate(self) -> float|None:
+        """
+        Measures the refresh rate of the window and converts the stimulus and mask durations to a whole
+        number of frames (at least one each). If no stable rate can be measured, frame locked mode is
+        turned off and durations are timed with core.wait as usual.
+        Returns:
+        float|None: The measured refresh rate in Hz, or None if it could not be measured.
+        """
+
+        self.frame_rate = self.window.getActualFrameRate(nIdentical=20, nMaxFrames=240, nWarmUpFrames=20, threshold=1)
+        if self.frame_rate is None:
+            if self.frame_locked:
+                print("Could not measure a stable refresh rate. Stimulus durations will be timed with core.wait instead.")
+                self.frame_locked = False
+            else:
+                print("Could not measure a stable refresh rate. The nominal frame period of the monitor will be used for timing checks.")
+            return None
+
+        return self.set_frame_rate(self.frame_rate)
+
+    def set_frame_rate(self, frame_rate:float) -> float:
+        """
+        Sets the refresh rate of the window and converts the stimulus and mask durations to a whole number of frames (at least one each).
+        Returns:
+        float: The refresh rate in Hz.
+        """
+
+        self.frame_rate = frame_rate
+        self.stimulus_visible_frames = max(1, round(self.stimulus_visible_secs * self.frame_rate))
+        self.stimulus_masked_frames = max(1, round(self.stimulus_masked_secs * self.frame_rate))
+        print(f"Refresh rate: {self.frame_rate:.2f} Hz. "
+              f"Stimulus: {self.stimulus_visible_frames} frames ({self.stimulus_visible_frames/self.frame_rate:.4f}s), "
+              f"mask: {self.stimulus_masked_frames} frames ({self.stimulus_masked_frames/self.frame_rate:.4f}s)")
+        return self.frame_rate
+
+    def present_for_frames(self, stimuli:list, n_frames:int, after_first_flip=None, first_frame_drawn:bool=False) -> float:
+        """
+        Draws the given stimuli on each of n_frames consecutive screen refreshes.
+        Parameters:
+        stimuli (list): The stimuli to draw.
+        n_frames (int): The number of flips to show the stimuli for.
+        after_first_flip (callable|None): A function to call straight after the first flip.
+        first_frame_drawn (bool): If True, the stimuli have already been drawn for the first frame.
+        Returns:
+        float: The trial clock time just after the first flip (i.e. the onset of the stimuli).
+        """
+
+        onset_time = None
+        for frame in range(n_frames):
+            if frame > 0 or not first_frame_drawn:
+                for stim in stimuli:
+                    stim.draw()
+            self.window.flip()
+            if onset_time is None:
+                onset_time = self.clock.getTime()
+                if after_first_flip is not None:
+                    after_first_flip()
+        return onset_time
+
     def show_countdown_bar(self, seconds:float):
         """
         Displays a loading bar on the screen.
+        The CPU time and dropped frame count of each countdown are added to countdown_stats.
         Parameters:
         seconds (float): The number of seconds to display the loading bar.
         """
 
-        backgroundBar = visual.Rect(self.window, width=20, height=1, pos=(0, 0), fillColor="gray")
-        bg_bar_left = 0 - backgroundBar.width/2
-        loadingBar = visual.Rect(self.window, width=0, height=1, pos=(bg_bar_left, 0), fillColor="green", anchor="left")
-        countdown = visual.TextStim(self.window, text="", pos=(0, -2), color="white")
-        start_time = core.getTime()
-        while core.getTime() - start_time < seconds:
-            countdown.setText(f"{int(seconds - (core.getTime() - start_time))+1}")
-            progress = (core.getTime() - start_time) / seconds
-            loadingBar.width = 20 * progress
-            countdown.draw()
-            backgroundBar.draw()
-            loadingBar.draw()
-            self.window.flip()
-        self.window.flip()
+        if self.countdown_bar is None:
+            frame_period = 1/self.frame_rate if self.frame_rate else self.window.monitorFramePeriod
+            self.countdown_bar = CountdownBar(self.window, frame_period)
+        self.countdown_stats.append(self.countdown_bar.show(seconds))
 
 
     def block(self, block_number:int=0, practice:bool=False):
@@ -541,29 +2771,57 @@ class SART:
         Args:
             block_number (int, optional): The number of the current block. Defaults to 0.
             practice (bool, optional): Indicates whether this is a practice block. Defaults to False.
-        This method sets up the visual objects for the task, creates a list of trials,
+        This method takes the visual objects for the task from the session stimulus cache (building it on the first block), takes the block's trials from the session plan,
         and iterates through each trial, executing them in sequence.
-        Results for each trial are recorded in the results dictionary, unless practice is True.
+        Results for each trial are recorded in the results buffer, unless practice is True.
         The method also initializes a clock to keep track of the timing for each trial.
+        In rush mode, the trials run with raised priority and without automatic garbage collection, and garbage is collected between trials.
+        At the end of a block (other than practice), its live statistics are printed and written with write_block_stats().
+        If warm_up_stimuli is True, every stimulus is drawn to the back buffer before the block starts.
+        If timing is recorded, the frame interval jitter of the block is added to block_timing.
         """
         
         event.Mouse(visible=False)
-        self.x_stim = visual.TextStim(self.window, text="X", height=3.35, color="white", 
-                            pos=(0, 0))
-        self.circle_stim = visual.Circle(self.window, radius=1.50, lineWidth=8,
-                                lineColor="white", pos=(0, -0.2))
-        self.num_stim = visual.TextStim(self.window, font="Arial", color="white", pos=(0, 0))
-        self.correct_stim = visual.TextStim(self.window, text="CORRECT", color="green", 
-                                    font="Arial", pos=(0, 0))
-        self.incorrect_stim = visual.TextStim(self.window, text="INCORRECT", color="red",
-                                        font="Arial", pos=(0, 0))
+        if self.stimuli is None:
+            self.stimuli = StimulusCache(self.window)
+            self.stimuli.build()
+        self.x_stim = self.stimuli.x_stim
+        self.circle_stim = self.stimuli.circle_stim
+        self.correct_stim = self.stimuli.correct_stim
+        self.incorrect_stim = self.stimuli.incorrect_stim
+        if self.warm_up_stimuli:
+            self.stimuli.warm_up()
         if self.countdown:
             self.show_countdown_bar(self.countdown_secs)
 
-        trials = self.create_trial_list(practice)
-        self.clock = core.Clock()
-        for trial_number, trial in enumerate(trials):
-            self.trial(trial, trial_number=trial_number+1, block_number=block_number, practice=practice)
+        trials = self.plan.practice if practice else self.plan.blocks[block_number-1]
+        if self.record_timing:
+            self.window.frameIntervals = []
+        if self.rush is not None:
+            self.rush.enter()
+        try:
+            self.clock = core.Clock()
+            for trial_number, trial in enumerate(trials):
+                self.trial(trial, trial_number=trial_number+1, block_number=block_number, practice=practice)
+                if self.rush is not None:
+                    self.rush.between_trials()
+        finally:
+            if self.rush is not None:
+                self.rush.exit()
+        if self.record_timing and len(self.window.frameIntervals) > 0:
+            intervals = np.asarray(self.window.frameIntervals)
+            self.block_timing.append({
+                'block': block_number,
+                'practice': practice,
+                'frames': len(intervals),
+                'frame_interval_mean_secs': float(intervals.mean()),
+                'frame_interval_sd_secs': float(intervals.std()),
+                'frame_interval_max_secs': float(intervals.max()),
+            })
+        if not practice:
+            self.write_block_stats(block_number)
+        if self.writer is not None:
+            self.writer.sync()
 
 
     def trial(self, parameters:dict, trial_number:int, block_number:int, practice:bool=False)->None:
@@ -588,53 +2846,209 @@ class SART:
         font_size=parameters['font_size']
         number = parameters['number']
         
-        self.num_stim.setHeight(font_size)
-        self.num_stim.setText(number)
-        self.num_stim.draw()
-        event.clearEvents()
-        self.clock.reset()
-        self.window.flip()
-        stimulus_start_time = self.clock.getTime()
-        self.x_stim.draw()
-        self.circle_stim.draw()
-        core.wait(self.stimulus_visible_secs - (self.clock.getTime()- stimulus_start_time))
-        mask_start_time = self.clock.getTime()
-        self.window.flip()
-        core.wait(self.stimulus_masked_secs - (self.clock.getTime() - mask_start_time))
-        self.window.flip()
-        if len(event.getKeys(self.exit_key)) > 0:
-            self.save_and_quit()
-        keys_pressed = event.getKeys(['space'], timeStamped=self.clock)
+        num_stim = self.stimuli.number_stim(number, font_size)
+        if self.record_timing:
+            dropped_frames_before = self.window.nDroppedFrames
+        if self.writer is not None:
+            self.writer.pause_writes()
+            allow_writes = self.writer.allow_writes
+        else:
+            allow_writes = None
+        #The draw time of the stimulus shows whether its font and texture still had to be prepared (see warm_up_stimuli).
+        #It is measured before the flip, as the flip itself mostly waits for the next refresh.
+        draw_start_time = core.getTime()
+        num_stim.draw()
+        if trial_number == 1:
+            self.first_trial_draw.append({'block': block_number, 'practice': practice, 'warmed_up': self.warm_up_stimuli,
+                                          'draw_secs': core.getTime() - draw_start_time})
+        if self.frame_locked:
+            self.responses.clear()
+            self.clock.reset()
+            stimulus_start_time = self.present_for_frames([num_stim], self.stimulus_visible_frames, first_frame_drawn=True)
+            mask_flip_time = self.present_for_frames([self.x_stim, self.circle_stim], self.stimulus_masked_frames, after_first_flip=allow_writes)
+            self.window.flip()
+            mask_end_time = self.clock.getTime()
+            stimulus_intended_secs = self.stimulus_visible_frames / self.frame_rate
+            mask_intended_secs = self.stimulus_masked_frames / self.frame_rate
+        else:
+            self.responses.clear()
+            self.clock.reset()
+            self.window.flip()
+            stimulus_start_time = self.clock.getTime()
+            self.x_stim.draw()
+            self.circle_stim.draw()
+            core.wait(self.stimulus_visible_secs - (self.clock.getTime()- stimulus_start_time))
+            mask_start_time = self.clock.getTime()
+            self.window.flip()
+            mask_flip_time = self.clock.getTime()
+            if allow_writes is not None:
+                allow_writes()
+            core.wait(self.stimulus_masked_secs - (self.clock.getTime() - mask_start_time))
+            self.window.flip()
+            mask_end_time = self.clock.getTime()
+            stimulus_intended_secs = self.stimulus_visible_secs
+            mask_intended_secs = self.stimulus_masked_secs
+        timing = {
+            'onset_time': stimulus_start_time,
+            'mask_time': mask_flip_time,
+            'offset_time': mask_end_time,
+            'stimulus_intended_secs': stimulus_intended_secs,
+            'stimulus_achieved_secs': mask_flip_time - stimulus_start_time,
+            'mask_intended_secs': mask_intended_secs,
+            'mask_achieved_secs': mask_end_time - mask_flip_time,
+        }
+        if self.record_timing:
+            timing['dropped_frames'] = self.window.nDroppedFrames - dropped_frames_before
+        keys_pressed = self.collect_presses(block_number, trial_number, mask_time=mask_flip_time)
+        response_time, correct_response = self.score_response(number, keys_pressed)
+
+        if practice:
+            feedback_stim = self.correct_stim if correct_response else self.incorrect_stim
+            if self.frame_locked:
+                self.present_for_frames([feedback_stim], self.stimulus_masked_frames)
+            else:
+                feedback_stim.draw()
+                feedback_start_time=self.clock.getTime()
+                self.window.flip()
+                core.wait(self.stimulus_masked_secs-(self.clock.getTime()-feedback_start_time))
+            self.window.flip()
+            self.collect_presses(block_number, trial_number, phase='feedback')
+        if not practice:
+            self.record_trial(block_number, trial_number, number, response_time, correct_response, **timing)
+
+    def score_response(self, number:int, keys_pressed:list) -> tuple[float|None, bool]:
+        """
+        Scores the response to a trial.
+        Parameters:
+        number (int): The number shown in the trial.
+        keys_pressed (list): The (key, time) tuples of the space presses in the trial.
+        Returns:
+        tuple[float|None, bool]: The response time of the first press (None if there was no press),
+        and whether the response was correct (a press for any number except the number to omit).
+        """
+
         should_press = number != self.omit_number
         pressed = len(keys_pressed) > 0
         response_time = None if not pressed else keys_pressed[0][1]
         correct_response=(should_press==pressed)
+        return response_time, correct_response
+
+    def record_trial(self, block_number:int, trial_number:int, number:int, response_time:float|None, correct_response:bool, **extra) -> None:
+        """
+        Calculates the derived measures of a scored trial and stores it with update_result().
+        Parameters:
+        block_number (int): The block number.
+        trial_number (int): The trial number within the block.
+        number (int): The number shown in the trial.
+        response_time (float|None): The response time, or None if there was no response.
+        correct_response (bool): Whether the response was correct.
+        **extra: Values for any extra columns.
+        """
 
-        if practice:
-            if correct_response:
-                self.correct_stim.draw()
-            else:
-                self.incorrect_stim.draw()
-            feedback_start_time=self.clock.getTime()
-            self.window.flip()
-            core.wait(self.stimulus_masked_secs-(self.clock.getTime()-feedback_start_time))
-            self.window.flip()
         last_four_avg = None
 
         """
-        If the omitted number was shown, and the response time was not None, 
-        calculate the average of the last four trials (Unless any of the last
-        four trials had the omitted number or had no response time)
+        If the omitted number was shown, calculate the average of the last 
+        four trials (Unless any of the last four trials had the omitted number
+        or had no response time). The results buffer keeps this up to date as
+        trials are added, so this is a constant time lookup.
         """
 
-        if not should_press:
-            prev_response_times = self.results['response_time'][-4:]
-            prev_shown_numbers = self.results['number_shown'][-4:]
-            if all([num != self.omit_number for num in prev_shown_numbers]) and all([time is not None for time in prev_response_times]):
-                last_four_avg = sum(prev_response_times)/4
-                
-        if not practice:
-            self.update_result(block_num=block_number, trial_num=trial_number, number_shown=number, response_correct=correct_response, response_time=response_time, last_four_avg=last_four_avg)
+        if number == self.omit_number:
+            last_four_avg = self.results.last_four_avg()
+
+        self.update_result(block_num=block_number, trial_num=trial_number, number_shown=number, response_correct=correct_response, response_time=response_time, last_four_avg=last_four_avg, **extra)
+
+
+
+class SessionOrchestrator:
+    def __init__(self, sessions:list[dict], loop:bool=False, report_file:str|None=None) -> None:
+        """
+        Runs a queue of SART sessions back to back in one process, keeping the window, the stimulus cache, the instruction
+        screens, the countdown bar, the response backend (if the next session uses the same kind) and the measured refresh
+        rate from one session to the next. The statistics of the stimulus cache start again for each session.
+        A new SART is created for each session, so all of the per-session state (participant, plan, results, logs and
+        statistics) starts fresh.
+        Parameters:
+        sessions (list[dict]): The SART parameters of each session (e.g. [{'blocks': 2, 'omit_number': 3}, {'blocks': 2, 'omit_number': 5}]).
+                               The window is opened with the monitor of the first session.
+        loop (bool): If True, the sessions are run again from the start until the participant dialog is cancelled.
+                     If False, each session is run once (the queue also stops if the participant dialog is cancelled).
+        report_file (str|None): A JSON file to save the turnaround report to. If None, the report is only printed.
+        """
+
+        self.sessions = sessions
+        self.loop = loop
+        self.report_file = report_file
+        self.report = []
+
+    def run(self) -> list[dict]:
+        """
+        Runs the sessions, then closes the window and quits.
+        Returns (if quitting is intercepted, e.g. in tests):
+        list[dict]: For each session, its number, participant number, output file, whether it was completed, and the turnaround:
+        the time from the end of the previous session to the start of this one (turnaround_secs), the part spent in the
+        participant and save dialogs (dialog_secs), and the rest, i.e. the set-up time of the task itself (overhead_secs).
+        """
+
+        shared = {}
+        previous_end_time = None
+        session_number = 0
+        while True:
+            for config in self.sessions:
+                start_time = core.getTime()
+                sart = SART(**config)
+                sart.owns_window = False
+                for attribute, value in shared.items():
+                    #A response backend is only reused if the session asks for the same kind
+                    if attribute == 'responses' and value is not None and value.name != sart.response_backend:
+                        continue
+                    setattr(sart, attribute, value)
+                if sart.stimuli is not None:
+                    sart.stimuli.reset_stats()
+                try:
+                    sart.run()
+                except SessionEnded:
+                    pass
+                end_time = core.getTime()
+                shared = {attribute: getattr(sart, attribute) for attribute in
+                          ['window', 'stimuli', 'message_stims', 'countdown_bar', 'responses', 'frame_rate']}
+                if sart.participant is None or not sart.run_timing:
+                    return self.finish(shared.get('window'))
+
+                session_number += 1
+                turnaround = start_time - previous_end_time if previous_end_time is not None else 0.0
+                turnaround += sart.run_timing['dialog_secs'] + sart.run_timing['setup_secs']
+                self.report.append({
+                    'session': session_number,
+                    'participant_number': sart.participant.number,
+                    'output_file': str(sart.output_file),
+                    'completed': sart.completed_blocks == sart.blocks,
+                    'turnaround_secs': turnaround,
+                    'dialog_secs': sart.run_timing['dialog_secs'],
+                    'overhead_secs': turnaround - sart.run_timing['dialog_secs'],
+                })
+                print(f"Session {session_number} (participant {sart.participant.number}): turnaround {turnaround:.2f}s, "
+                      f"of which {turnaround - sart.run_timing['dialog_secs']:.2f}s set-up")
+                previous_end_time = end_time
+            if not self.loop:
+                return self.finish(shared.get('window'))
+
+    def finish(self, window) -> list[dict]:
+        """
+        Prints and saves the turnaround report, closes the window and quits.
+        """
+
+        if len(self.report) > 1:
+            overheads = [session['overhead_secs'] for session in self.report[1:]]
+            print(f"{len(self.report)} sessions. Set-up time between sessions: {np.mean(overheads):.2f}s mean, {max(overheads):.2f}s max")
+        if self.report_file:
+            with open(self.report_file, 'w', encoding='utf-8') as report_file:
+                json.dump(self.report, report_file, indent=2)
+        if window is not None:
+            window.close()
+        core.quit()
+        return self.report
 
         
 if __name__ == "__main__":
@@ -0,0 +1,187 @@
+"""
+Batch analysis of SART output files.
+
+Reads every output file in an archive (by default all SART_*.xlsx files in a folder
+and its subfolders) in parallel, and computes the standard SART measures for each
+participant and block:
+
+- commission errors: presses on trials showing the number to omit
+- omission errors: no press on any other trial
+- mean response time, its standard deviation and coefficient of variation (go trials with a press)
+- the pre-no-go average of the last four response times (last_four_avg), overall and
+  split by whether the no-go trial was a commission error or a correct withhold
+
+The results are written as one table with a row per file, participant and block.
+
+Usage:
+
+    python sart_analysis.py path/to/archive --output summary.csv
+
+Run with --help for all of the options.
+"""
+
+import argparse
+import concurrent.futures
+import pathlib
+import time
+
+import numpy as np
+import pandas as pd
+
+import python_sart
+
+COLUMNS = ['participant_number', 'block', 'trial', 'number_to_omit', 'number_shown', 'response_correct', 'response_time', 'last_four_avg']
+
+
+def read_analysis_columns(path:str|pathlib.Path) -> tuple[pd.DataFrame, float]:
+    """
+    Reads the columns needed for the analysis from a SART output file (.xlsx, .parquet, .feather or .csv),
+    in either the wide or the normalized layout. Unlike python_sart.read_results(), which returns every column of
+    the file, only the analysis columns are read, and the time taken is returned as well.
+    Parameters:
+    path (str|pathlib.Path): The file to read.
+    Returns:
+    tuple[pd.DataFrame, float]: The trials, with a source_file column added, and the time taken to read the file in seconds.
+    """
+
+    start_time = time.perf_counter()
+    suffix = pathlib.Path(path).suffix.lower()
+    session = python_sart.read_session(path)
+    columns = COLUMNS if session is None else [col for col in COLUMNS if col not in python_sart.SESSION_COLUMNS]
+    if suffix == '.csv':
+        results_df = pd.read_csv(path, usecols=columns)
+    elif suffix == '.parquet':
+        results_df = pd.read_parquet(path, columns=columns)
+    elif suffix == '.feather':
+        results_df = pd.read_feather(path, columns=columns)
+    else:
+        results_df = pd.read_excel(path, usecols=columns)
+    if session is not None:
+        results_df = results_df.assign(**{col: session[col] for col in COLUMNS if col in python_sart.SESSION_COLUMNS})[COLUMNS]
+    results_df['source_file'] = str(path)
+    return results_df, time.perf_counter() - start_time
+
+
+def read_archive(paths:list, processes:int|None=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Reads many SART output files in parallel.
+    Parameters:
+    paths (list): The files to read.
+    processes (int|None): The number of worker processes. If None, one per CPU. If 1, no pool is used.
+    Returns:
+    tuple[pd.DataFrame, pd.DataFrame]: All of the trials, and the read time of each file (columns source_file, read_secs, n_trials).
+    """
+
+    if processes == 1:
+        read = [read_analysis_columns(path) for path in paths]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+            read = list(pool.map(read_analysis_columns, paths, chunksize=8))
+    timings = pd.DataFrame({
+        'source_file': [str(path) for path in paths],
+        'read_secs': [read_secs for _, read_secs in read],
+        'n_trials': [len(results_df) for results_df, _ in read],
+    })
+    if len(read) == 0:
+        return pd.DataFrame(columns=COLUMNS + ['source_file']), timings
+    return pd.concat([results_df for results_df, _ in read], ignore_index=True), timings
+
+
+def compute_metrics(results_df:pd.DataFrame, by:list|None=None) -> pd.DataFrame:
+    """
+    Computes the SART measures for each group of trials, using vectorized pandas operations.
+    Parameters:
+    results_df (pd.DataFrame): Trials in the SART output layout.
+    by (list|None): The columns to group the trials by. Defaults to one group per file, participant and block.
+    Returns:
+    pd.DataFrame: One row per group with the columns n_trials, n_nogo, commission_errors, omission_errors,
+    commission_rate, omission_rate, mean_rt, rt_sd, rt_cv, last_four_avg, pre_commission_rt and pre_withhold_rt.
+    """
+
+    if by is None:
+        by = ['source_file', 'participant_number', 'block']
+    correct = results_df['response_correct'].astype(bool)
+    nogo = results_df['number_shown'] == results_df['number_to_omit']
+    trials = results_df[by].assign(
+        nogo=nogo,
+        commission=nogo & ~correct,
+        omission=~nogo & ~correct,
+        go_rt=results_df['response_time'].where(~nogo),
+        last_four_avg=results_df['last_four_avg'],
+        pre_commission_rt=results_df['last_four_avg'].where(nogo & ~correct),
+        pre_withhold_rt=results_df['last_four_avg'].where(nogo & correct),
+    )
+    summary = trials.groupby(by, sort=True).agg(
+        n_trials=('nogo', 'size'),
+        n_nogo=('nogo', 'sum'),
+        commission_errors=('commission', 'sum'),
+        omission_errors=('omission', 'sum'),
+        mean_rt=('go_rt', 'mean'),
+        rt_sd=('go_rt', 'std'),
+        last_four_avg=('last_four_avg', 'mean'),
+        pre_commission_rt=('pre_commission_rt', 'mean'),
+        pre_withhold_rt=('pre_withhold_rt', 'mean'),
+    )
+    n_go = summary['n_trials'] - summary['n_nogo']
+    summary['commission_rate'] = summary['commission_errors'] / summary['n_nogo'].replace(0, np.nan)
+    summary['omission_rate'] = summary['omission_errors'] / n_go.replace(0, np.nan)
+    summary['rt_cv'] = summary['rt_sd'] / summary['mean_rt']
+    column_order = ['n_trials', 'n_nogo', 'commission_errors', 'omission_errors', 'commission_rate', 'omission_rate',
+                    'mean_rt', 'rt_sd', 'rt_cv', 'last_four_avg', 'pre_commission_rt', 'pre_withhold_rt']
+    return summary[column_order].reset_index()
+
+
+def find_files(archive:str|pathlib.Path, pattern:str="SART_*.xlsx") -> list[pathlib.Path]:
+    """
+    Returns the files in the archive folder (and its subfolders) matching the pattern, sorted by path.
+    Temporary files left open by Excel (starting with '~$') and the files saved next to each output file
+    (such as the trial log SART_12.log.csv, see python_sart.is_results_file()) are skipped.
+    """
+
+    return sorted(path for path in pathlib.Path(archive).rglob(pattern)
+                  if not path.name.startswith('~$') and python_sart.is_results_file(path))
+
+
+def write_table(table:pd.DataFrame, path:str|pathlib.Path) -> None:
+    """
+    Writes a table to a file. The format is chosen from the file extension (.xlsx or .csv).
+    """
+
+    if str(path).endswith('.xlsx'):
+        table.to_excel(path, freeze_panes=(1, 0), index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute SART measures for every output file in an archive.")
+    parser.add_argument('archive', help="Folder containing the SART output files (searched recursively).")
+    parser.add_argument('--pattern', default="SART_*.xlsx", help="File name pattern to match (default: SART_*.xlsx).")
+    parser.add_argument('--by', choices=['block', 'participant'], default='block',
+                        help="Summarise each block separately, or each participant's whole session.")
+    parser.add_argument('--processes', type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('--output', default="sart_summary.csv", help="Output file (.csv or .xlsx).")
+    parser.add_argument('--timings', default=None, help="Also write the read time of each file to this file.")
+    args = parser.parse_args()
+
+    paths = find_files(args.archive, args.pattern)
+    if len(paths) == 0:
+        parser.error(f"No files matching {args.pattern} found in {args.archive}")
+
+    start_time = time.perf_counter()
+    results_df, timings = read_archive(paths, processes=args.processes)
+    read_secs = time.perf_counter() - start_time
+    by = ['source_file', 'participant_number', 'block'] if args.by == 'block' else ['source_file', 'participant_number']
+    summary = compute_metrics(results_df, by=by)
+    write_table(summary, args.output)
+
+    print(f"Read {len(paths)} files ({len(results_df)} trials) in {read_secs:.2f}s. "
+          f"Per file: {timings['read_secs'].mean()*1000:.1f} ms mean, {timings['read_secs'].max()*1000:.1f} ms max")
+    print(f"Summary saved to {args.output}")
+    if args.timings:
+        write_table(timings, args.timings)
+        print(f"Read times saved to {args.timings}")
+
+
+if __name__ == "__main__":
+    main()
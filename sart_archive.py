@@ -0,0 +1,339 @@
+"""
+A partitioned, memory-mappable archive of SART sessions.
+
+Output files written by SART.save_and_quit() (in any output format) are ingested into a
+folder tree partitioned by study, date, participant and session (the name of the output file,
+so that two sessions of a participant on the same day are kept apart):
+
+    archive/
+        index.csv
+        study=pilot/date=2024-05-01/participant=12/session=SART_12/
+            session.json
+            block.npy
+            trial.npy
+            number_shown.npy
+            response_correct.npy
+            response_time.npy
+            last_four_avg.npy
+            ...
+
+Each trial column is stored as a NumPy .npy file with a compact dtype, and the values that
+are the same for every trial of a session (participant information, the number to omit and
+whether the session was completed) are stored once, in session.json and in the participant
+index (index.csv). Queries read the index, memory map only the columns they need, and copy
+only the matching trials, so a query over tens of thousands of sessions does not load the
+archive into memory. A column that a session does not have (e.g. an output file from an older
+version) is returned as missing values for that session.
+
+Usage:
+
+    python sart_archive.py ingest path/to/archive output/SART_*.xlsx --study pilot
+    python sart_archive.py query path/to/archive --block 2 --nogo --output nogo_block2.csv
+
+Or from Python:
+
+    from sart_archive import Archive
+
+    archive = Archive("path/to/archive")
+    nogo_trials = archive.query(['response_correct', 'last_four_avg'], block=2, nogo=True)
+
+Run with --help for all of the options.
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import json
+import os
+import pathlib
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import python_sart
+
+INDEX_COLUMNS = ['study', 'date', 'participant', 'session', 'n_trials', 'path', 'source_file'] + python_sart.SESSION_COLUMNS
+
+
+def _partition_value(value) -> str:
+    """
+    Makes a value safe to use in a partition folder name.
+    """
+
+    return "".join(c if c.isalnum() or c in '-_.' else '_' for c in str(value))
+
+
+def ingest_file(root:str|pathlib.Path, path:str|pathlib.Path, study:str, date:str|None=None) -> dict:
+    """
+    Writes one SART output file into its partition of the archive. The index is not updated (see Archive.ingest()).
+    The session is written to a temporary folder first, which then replaces the partition, so no columns of an earlier
+    ingest of the same file are left behind. A partition that holds a different source file is never replaced.
+    Parameters:
+    root (str|pathlib.Path): The archive folder.
+    path (str|pathlib.Path): The output file to ingest (.xlsx, .parquet, .feather or .csv).
+    study (str): The study the session belongs to.
+    date (str|None): The session date (YYYY-MM-DD). If None, the modification date of the file is used.
+    Returns:
+    dict: The index row of the session.
+    Raises:
+    FileExistsError: If the partition already holds a session ingested from a different file.
+    """
+
+    results_df = python_sart.read_results(path)
+    if date is None:
+        date = datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+    session = {}
+    for col in python_sart.SESSION_COLUMNS:
+        value = results_df[col].iloc[0] if col in results_df.columns and len(results_df) > 0 else None
+        session[col] = value.item() if isinstance(value, np.generic) else value
+    session_name = pathlib.Path(path).stem
+    participant = session['participant_number'] if session['participant_number'] is not None else session_name
+    partition = pathlib.Path(f"study={_partition_value(study)}", f"date={_partition_value(date)}",
+                             f"participant={_partition_value(participant)}", f"session={_partition_value(session_name)}")
+    folder = pathlib.Path(root) / partition
+    source_file = str(pathlib.Path(path).resolve())
+    _check_partition(folder, source_file)
+    temp_folder = folder.with_name(f"{folder.name}.tmp-{os.getpid()}")
+    shutil.rmtree(temp_folder, ignore_errors=True)
+    temp_folder.mkdir(parents=True)
+
+    columns = []
+    for col in results_df.columns:
+        if col in python_sart.SESSION_COLUMNS:
+            continue
+        dtype = python_sart.ResultsBuffer.DTYPES.get(col)
+        values = results_df[col].to_numpy()
+        if dtype is not None:
+            values = values.astype(dtype)
+        elif values.dtype == object:
+            continue
+        np.save(temp_folder / f"{col}.npy", values)
+        columns.append(col)
+
+    with open(temp_folder / "session.json", 'w', encoding='utf-8') as session_file:
+        json.dump({**session, 'study': study, 'date': date, 'session': session_name, 'n_trials': len(results_df), 'columns': columns,
+                   'source_file': source_file}, session_file, indent=2, default=str)
+    try:
+        os.rename(temp_folder, folder)
+    except OSError:
+        #The partition exists (possibly written by another worker in the meantime): only an earlier ingest of the same file is replaced
+        try:
+            _check_partition(folder, source_file)
+        except FileExistsError:
+            shutil.rmtree(temp_folder, ignore_errors=True)
+            raise
+        old_folder = folder.with_name(f"{folder.name}.old-{os.getpid()}")
+        os.rename(folder, old_folder)
+        os.rename(temp_folder, folder)
+        shutil.rmtree(old_folder, ignore_errors=True)
+    return {'study': study, 'date': date, 'participant': str(participant), 'session': session_name, 'n_trials': len(results_df),
+            'path': partition.as_posix(), 'source_file': source_file, **session}
+
+
+def _check_partition(folder:pathlib.Path, source_file:str) -> None:
+    """
+    Raises FileExistsError if a partition folder already holds a session ingested from a different source file.
+    """
+
+    if not folder.exists():
+        return
+    session_path = folder / "session.json"
+    existing = None
+    if session_path.exists():
+        with open(session_path, 'r', encoding='utf-8') as session_file:
+            existing = json.load(session_file).get('source_file')
+    if existing != source_file:
+        raise FileExistsError(f"{folder} already holds a session from {existing or 'an unknown file'}, not replacing it with {source_file}")
+
+
+class Archive:
+    def __init__(self, root:str|pathlib.Path) -> None:
+        """
+        A partitioned archive of SART sessions in a folder (created if it does not exist).
+        Parameters:
+        root (str|pathlib.Path): The archive folder.
+        """
+
+        self.root = pathlib.Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.root / "index.csv"
+
+    def index(self) -> pd.DataFrame:
+        """
+        Returns the participant index: one row per session, with its study, date, participant, session, number of trials,
+        partition path, source file and session values.
+        """
+
+        if not self.index_path.exists():
+            return pd.DataFrame(columns=INDEX_COLUMNS)
+        return pd.read_csv(self.index_path, dtype={'study': str, 'date': str, 'participant': str, 'session': str, 'path': str})
+
+    def _write_index(self, index:pd.DataFrame) -> None:
+        temp_path = self.index_path.with_suffix('.tmp')
+        index.to_csv(temp_path, index=False)
+        os.replace(temp_path, self.index_path)
+
+    def ingest(self, paths:list, study:str, date:str|None=None, processes:int|None=None) -> pd.DataFrame:
+        """
+        Ingests SART output files into the archive, in parallel, and updates the index.
+        A session that is already in the archive (same study, date, participant and source file) is replaced.
+        Two different output files with the same name, participant and date raise a FileExistsError instead.
+        Parameters:
+        paths (list): The output files to ingest.
+        study (str): The study the sessions belong to.
+        date (str|None): The date of the sessions (YYYY-MM-DD). If None, the modification date of each file is used.
+        processes (int|None): The number of worker processes. If None, one per CPU. If 1, no pool is used.
+        Returns:
+        pd.DataFrame: The index rows of the ingested sessions.
+        """
+
+        paths = list(dict.fromkeys(str(pathlib.Path(path).resolve()) for path in paths))
+        if processes == 1:
+            rows = [ingest_file(self.root, path, study, date) for path in paths]
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+                futures = [pool.submit(ingest_file, self.root, path, study, date) for path in paths]
+                rows = [future.result() for future in futures]
+        ingested = pd.DataFrame(rows, columns=INDEX_COLUMNS)
+        index = self.index()
+        index = index[~index['path'].isin(ingested['path'])]
+        self._write_index(pd.concat([index, ingested], ignore_index=True).sort_values('path', ignore_index=True))
+        return ingested
+
+    def sessions(self, study:str|None=None, date:str|None=None, participant:str|None=None) -> pd.DataFrame:
+        """
+        Returns the index rows of the sessions matching the given study, date and participant (None matches any).
+        """
+
+        index = self.index()
+        for col, value in [('study', study), ('date', date), ('participant', participant)]:
+            if value is not None:
+                index = index[index[col] == str(value)]
+        return index
+
+    def column(self, session_path:str, column:str) -> np.ndarray:
+        """
+        Returns a read-only memory map of one trial column of a session.
+        Parameters:
+        session_path (str): The partition path of the session (the path column of the index).
+        column (str): The column name (e.g. 'response_time').
+        """
+
+        return np.load(self.root / session_path / f"{column}.npy", mmap_mode='r')
+
+    def columns(self, session_path:str) -> list:
+        """
+        Returns the trial columns stored for a session (from its session.json).
+        Parameters:
+        session_path (str): The partition path of the session (the path column of the index).
+        """
+
+        with open(self.root / session_path / "session.json", 'r', encoding='utf-8') as session_file:
+            return json.load(session_file)['columns']
+
+    def query(self, columns:list|None=None, block:int|None=None, nogo:bool|None=None, where=None,
+              study:str|None=None, date:str|None=None, participant:str|None=None,
+              session_columns:list=['participant_number', 'number_to_omit']) -> pd.DataFrame:
+        """
+        Returns the trials matching a query. Only the columns needed for the filters and the result are memory mapped,
+        and only the matching trials are copied into memory. A returned column that a session does not have is filled with
+        missing values; a session without a column needed by the block or nogo filter raises a KeyError.
+        Parameters:
+        columns (list|None): The trial columns to return. Defaults to the standard trial columns.
+        block (int|None): Only return trials of this block.
+        nogo (bool|None): If True, only trials showing the number to omit; if False, only the other trials.
+        where (callable|None): An extra filter, called with a function that returns a column of the session (by name) and
+                               the index row of the session; it should return a boolean array (or None to keep every trial).
+        study, date, participant (str|None): Only search sessions of this study, date or participant.
+        session_columns (list): Index columns added to every returned trial.
+        Returns:
+        pd.DataFrame: One row per matching trial, with the study, date and participant, the session columns and the trial columns.
+        """
+
+        if columns is None:
+            columns = list(python_sart.ResultsBuffer.DTYPES)
+        frames = []
+        for session in self.sessions(study, date, participant).itertuples(index=False):
+            session_row = session._asdict()
+            stored_columns = self.columns(session.path)
+            columns_cache = {}
+
+            def get(column):
+                if column not in columns_cache:
+                    if column not in stored_columns:
+                        raise KeyError(f"The session {session.path} has no '{column}' column")
+                    columns_cache[column] = self.column(session.path, column)
+                return columns_cache[column]
+
+            mask = np.ones(int(session.n_trials), dtype=bool)
+            if block is not None:
+                mask &= get('block') == block
+            if nogo is not None:
+                mask &= (get('number_shown') == session.number_to_omit) == nogo
+            if where is not None:
+                extra_mask = where(get, session_row)
+                if extra_mask is not None:
+                    mask &= extra_mask
+            selected = np.flatnonzero(mask)
+            if len(selected) == 0:
+                continue
+            frame = {'study': session.study, 'date': session.date, 'participant': session.participant, 'session': session.session}
+            for col in session_columns:
+                frame[col] = session_row[col]
+            for col in columns:
+                frame[col] = np.asarray(get(col)[selected]) if col in stored_columns else np.full(len(selected), np.nan)
+            frames.append(pd.DataFrame(frame, index=pd.RangeIndex(len(selected)), copy=False))
+        if len(frames) == 0:
+            return pd.DataFrame(columns=['study', 'date', 'participant', 'session'] + list(session_columns) + list(columns))
+        return pd.concat(frames, ignore_index=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Ingest SART output files into a partitioned archive, and query it.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Add output files to the archive.")
+    ingest_parser.add_argument('archive', help="The archive folder (created if it does not exist).")
+    ingest_parser.add_argument('files', nargs='+', help="SART output files (.xlsx, .parquet, .feather or .csv).")
+    ingest_parser.add_argument('--study', required=True, help="The study the sessions belong to.")
+    ingest_parser.add_argument('--date', default=None, help="The session date (YYYY-MM-DD). Defaults to each file's modification date.")
+    ingest_parser.add_argument('--processes', type=int, default=None, help="Number of worker processes (default: one per CPU).")
+
+    query_parser = subparsers.add_parser('query', help="Select trials from the archive.")
+    query_parser.add_argument('archive', help="The archive folder.")
+    query_parser.add_argument('--study', default=None)
+    query_parser.add_argument('--date', default=None)
+    query_parser.add_argument('--participant', default=None)
+    query_parser.add_argument('--block', type=int, default=None, help="Only trials of this block.")
+    query_parser.add_argument('--nogo', action='store_true', help="Only trials showing the number to omit.")
+    query_parser.add_argument('--go', action='store_true', help="Only trials not showing the number to omit.")
+    query_parser.add_argument('--columns', default=None, help="Comma separated trial columns to return.")
+    query_parser.add_argument('--output', default="sart_query.csv", help="Output file (.csv or .xlsx).")
+    args = parser.parse_args()
+
+    archive = Archive(args.archive)
+    start_time = time.perf_counter()
+    if args.command == 'ingest':
+        files = [path for path in args.files if python_sart.is_results_file(path)]
+        if len(files) < len(args.files):
+            print(f"Skipping {len(args.files) - len(files)} files saved next to the output files (trial logs, session tables, ...)")
+        ingested = archive.ingest(files, args.study, args.date, processes=args.processes)
+        print(f"Ingested {len(ingested)} sessions ({ingested['n_trials'].sum()} trials) in {time.perf_counter() - start_time:.2f}s")
+    else:
+        if args.nogo and args.go:
+            parser.error("--nogo and --go cannot be used together")
+        nogo = True if args.nogo else False if args.go else None
+        columns = args.columns.split(',') if args.columns else None
+        trials = archive.query(columns, block=args.block, nogo=nogo, study=args.study, date=args.date, participant=args.participant)
+        if args.output.endswith('.xlsx'):
+            trials.to_excel(args.output, freeze_panes=(1, 0), index=False)
+        else:
+            trials.to_csv(args.output, index=False)
+        print(f"Selected {len(trials)} trials in {time.perf_counter() - start_time:.2f}s")
+        print(f"Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
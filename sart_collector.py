@@ -0,0 +1,207 @@
+"""
+A collector service that gathers the trials of SART sessions running on several computers.
+
+Each station running the task with collector_address="host:port" streams its trials to the
+collector (see python_sart.CollectorClient) in batches of newline-delimited JSON over TCP.
+The collector, built on asyncio, writes every trial to one consolidated store:
+
+    store/
+        trials.csv      one row per trial, with the station and session it came from
+        sessions.jsonl  one line each time a session connects (with its participant details) and ends
+
+A batch is only confirmed once it has been written, so a station never sends faster than
+the store can be written to. Trials that are received twice (e.g. when a station retries a
+batch whose confirmation was lost) are only stored once.
+A session resumed from a checkpoint is sent as a new session, with the attempt number at the
+end of its id (e.g. lab1-SART_12-1234-1), so the trials of the block it runs again are stored
+next to those of the interrupted attempt instead of being ignored as duplicates.
+
+If a station cannot reach the collector, it saves the trials to a fallback file next to its
+output file (e.g. SART_12.collector.jsonl) instead. These files can be sent later:
+
+    python sart_collector.py serve --store collected --port 8765
+    python sart_collector.py upload output/*.collector.jsonl --address localhost:8765
+
+To try the service on one machine, start it with 'serve' and run the task (or the simulation)
+with collector_address="localhost:8765".
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import pathlib
+import socket
+
+TRIAL_COLUMNS = ['station', 'session', 'block', 'trial', 'number_shown', 'response_correct', 'response_time', 'last_four_avg', 'extra']
+
+
+class Collector:
+    def __init__(self, store:str|pathlib.Path) -> None:
+        """
+        Writes the trials received from stations to a store folder (created if it does not exist).
+        Trials already in the store are loaded, so that they are not stored again after a restart.
+        Parameters:
+        store (str|pathlib.Path): The store folder.
+        """
+
+        self.store = pathlib.Path(store)
+        self.store.mkdir(parents=True, exist_ok=True)
+        self.trials_path = self.store / "trials.csv"
+        self.sessions_path = self.store / "sessions.jsonl"
+        self.sessions = {}
+        self.seen = {}
+        self.rows_stored = 0
+        self.duplicates = 0
+        self._lock = asyncio.Lock()
+        if self.trials_path.exists():
+            with open(self.trials_path, 'r', newline='', encoding='utf-8') as trials_file:
+                for row in csv.DictReader(trials_file):
+                    self.seen.setdefault(row['session'], set()).add((int(row['block']), int(row['trial'])))
+        new_file = not self.trials_path.exists()
+        self._trials_file = open(self.trials_path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._trials_file)
+        if new_file:
+            self._writer.writerow(TRIAL_COLUMNS)
+            self._trials_file.flush()
+
+    def _log_session(self, record:dict) -> None:
+        with open(self.sessions_path, 'a', encoding='utf-8') as sessions_file:
+            sessions_file.write(json.dumps(record) + "\n")
+
+    def _write_rows(self, session:str, rows:list) -> int:
+        info = self.sessions[session]
+        columns = info['columns']
+        seen = self.seen.setdefault(session, set())
+        stored = 0
+        for row in rows:
+            values = dict(zip(columns, row))
+            key = (int(values['block']), int(values['trial']))
+            if key in seen:
+                self.duplicates += 1
+                continue
+            seen.add(key)
+            extra = {col: value for col, value in values.items() if col not in TRIAL_COLUMNS}
+            self._writer.writerow([info['station'], session] + ['' if values.get(col) is None else values.get(col) for col in TRIAL_COLUMNS[2:-1]]
+                                  + [json.dumps(extra) if extra else ''])
+            stored += 1
+        self._trials_file.flush()
+        self.rows_stored += stored
+        return stored
+
+    async def handle(self, message:dict) -> dict:
+        """
+        Handles one message from a station and returns the reply.
+        Messages are 'hello' (a session starts or reconnects), 'rows' (a batch of trials) and 'end' (a session has finished).
+        """
+
+        session = message.get('session')
+        if message.get('type') == 'hello':
+            self.sessions[session] = {'station': message['station'], 'columns': message['columns']}
+            async with self._lock:
+                await asyncio.to_thread(self._log_session, message)
+            return {'ok': True}
+        if session not in self.sessions:
+            return {'ok': False, 'error': f"unknown session {session}, send hello first"}
+        if message.get('type') == 'rows':
+            async with self._lock:
+                stored = await asyncio.to_thread(self._write_rows, session, message['rows'])
+            return {'ok': True, 'stored': stored}
+        if message.get('type') == 'end':
+            async with self._lock:
+                await asyncio.to_thread(self._log_session, message)
+            print(f"Session {session} from {self.sessions[session]['station']} ended ({message.get('rows')} rows)")
+            return {'ok': True}
+        return {'ok': False, 'error': f"unknown message type {message.get('type')}"}
+
+    async def handle_connection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info('peername')
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.handle(json.loads(line))
+                except (ValueError, KeyError) as e:
+                    reply = {'ok': False, 'error': str(e)}
+                writer.write((json.dumps(reply) + "\n").encode('utf-8'))
+                await writer.drain()
+        except ConnectionError as e:
+            print(f"Connection from {peer} lost ({e})")
+        finally:
+            writer.close()
+
+    def close(self) -> None:
+        self._trials_file.close()
+
+
+async def serve(store:str|pathlib.Path, host:str="0.0.0.0", port:int=8765) -> None:
+    """
+    Runs the collector service until it is interrupted.
+    """
+
+    collector = Collector(store)
+    server = await asyncio.start_server(collector.handle_connection, host, port, limit=2**24)
+    print(f"Collecting SART trials on {host}:{port} into {collector.store}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        collector.close()
+        print(f"Stored {collector.rows_stored} trials ({collector.duplicates} duplicates ignored)")
+
+
+def upload(path:str|pathlib.Path, address:str, timeout:float=10.0) -> int:
+    """
+    Sends a fallback file written by a station that could not reach the collector.
+    Trials the collector already has are ignored by it, so a file can safely be sent more than once.
+    Parameters:
+    path (str|pathlib.Path): The fallback file.
+    address (str): The collector address, as 'host:port'.
+    timeout (float): The time to wait for each reply, in seconds.
+    Returns:
+    int: The number of trials the collector stored.
+    """
+
+    host, port = address.rsplit(':', 1)
+    stored = 0
+    with socket.create_connection((host, int(port)), timeout=timeout) as connection, \
+            connection.makefile('r', encoding='utf-8') as replies, open(path, 'r', encoding='utf-8') as fallback_file:
+        for line in fallback_file:
+            if not line.strip():
+                continue
+            connection.sendall(line.rstrip("\n").encode('utf-8') + b"\n")
+            reply = json.loads(replies.readline())
+            if not reply.get('ok'):
+                raise ConnectionError(f"The collector rejected {path}: {reply.get('error')}")
+            stored += reply.get('stored', 0)
+    return stored
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Collect the trials of SART sessions running on several computers.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the collector service.")
+    serve_parser.add_argument('--store', default="collected", help="Folder to write the trials to (default: collected).")
+    serve_parser.add_argument('--host', default="0.0.0.0", help="Address to listen on (default: all interfaces).")
+    serve_parser.add_argument('--port', type=int, default=8765)
+
+    upload_parser = subparsers.add_parser('upload', help="Send fallback files saved by stations that could not reach the collector.")
+    upload_parser.add_argument('files', nargs='+', help="Fallback files (*.collector.jsonl).")
+    upload_parser.add_argument('--address', default="localhost:8765", help="The collector address (default: localhost:8765).")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.store, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+    else:
+        for path in args.files:
+            print(f"{path}: {upload(path, args.address)} trials stored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Vectorized re-scoring of SART output files, and verification of the stored scores.
+
+During a session, response_correct and last_four_avg are calculated one trial at a time
+(SART.score_response() and SART.record_trial()). This tool recalculates them from the raw
+columns (number_shown, response_time and number_to_omit, with the session and optionally
+block boundaries) for every trial of an archive at once, using NumPy array operations
+instead of a loop over trials:
+
+- response_correct: a press (a response time) on any number except the number to omit,
+  or no press on the number to omit
+- last_four_avg: on trials showing the number to omit, the average response time of the
+  four previous trials of the session, if all four had a press and did not show the
+  number to omit (otherwise blank)
+
+In verification mode, the recalculated values are compared with the values stored in the
+files, and every trial where they differ is reported.
+
+Usage:
+
+    python sart_rescore.py path/to/archive --output rescored.csv
+    python sart_rescore.py path/to/archive --verify --output discrepancies.csv
+
+Run with --help for all of the options.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from sart_analysis import find_files, read_archive, write_table
+
+DERIVED_COLUMNS = ['response_correct', 'last_four_avg']
+
+
+def score(number_shown:np.ndarray, response_time:np.ndarray, number_to_omit:np.ndarray|int,
+          session_start:np.ndarray|None=None) -> dict[str, np.ndarray]:
+    """
+    Calculates the derived columns for many trials at once.
+    Parameters:
+    number_shown (np.ndarray): The number shown in each trial.
+    response_time (np.ndarray): The response time of each trial, NaN if there was no press.
+    number_to_omit (np.ndarray|int): The number to omit, for each trial or for all of them.
+    session_start (np.ndarray|None): True for the first trial of each session (or of each run of trials that the
+                                     last four average should not look back past, e.g. each block). If None,
+                                     all of the trials are treated as one session.
+    Returns:
+    dict[str, np.ndarray]: The response_correct and last_four_avg columns (NaN where there is no average).
+    """
+
+    number_shown = np.asarray(number_shown)
+    response_time = np.asarray(response_time, dtype=np.float64)
+    n_trials = len(number_shown)
+    if session_start is None:
+        session_start = np.zeros(n_trials, dtype=bool)
+        session_start[:1] = True
+    session_start = np.asarray(session_start, dtype=bool)
+
+    nogo = number_shown == number_to_omit
+    pressed = ~np.isnan(response_time)
+    response_correct = pressed != nogo
+
+    # The number of consecutive trials with a press on a go trial ending at each trial. A trial that breaks the
+    # run counts as its own last break, and a session start acts as a break just before the trial.
+    valid = pressed & ~nogo
+    positions = np.arange(n_trials)
+    last_break = np.where(~valid, positions, np.where(session_start, positions - 1, -1))
+    streak = positions - np.maximum.accumulate(last_break)
+    streak_before = np.zeros(n_trials, dtype=np.int64)
+    streak_before[1:] = streak[:-1]
+    streak_before[session_start] = 0
+
+    valid_response_time = np.where(valid, response_time, 0.0)
+    previous_four_sum = np.zeros(n_trials)
+    for lag in range(1, 5):
+        previous_four_sum[lag:] += valid_response_time[:-lag]
+    last_four_avg = np.where(nogo & (streak_before >= 4), previous_four_sum / 4, np.nan)
+    return {'response_correct': response_correct, 'last_four_avg': last_four_avg}
+
+
+def session_starts(results_df:pd.DataFrame, by:list, reset_at_block:bool=False) -> np.ndarray:
+    """
+    Returns True for the first trial of each session, where a session is a run of consecutive rows with the same
+    values in the by columns (and the same block, if reset_at_block is True).
+    """
+
+    keys = [col for col in by if col in results_df.columns]
+    if reset_at_block:
+        keys.append('block')
+    if len(keys) == 0:
+        starts = np.zeros(len(results_df), dtype=bool)
+        starts[:1] = True
+        return starts
+    codes, _ = pd.MultiIndex.from_frame(results_df[keys]).factorize()
+    starts = np.ones(len(results_df), dtype=bool)
+    starts[1:] = codes[1:] != codes[:-1]
+    return starts
+
+
+def rescore(results_df:pd.DataFrame, by:list=['source_file', 'participant_number'], reset_at_block:bool=False) -> pd.DataFrame:
+    """
+    Recalculates the derived columns of trials in the SART output layout.
+    The trials of each session must be consecutive and in the order they were run, as they are in the output files.
+    Parameters:
+    results_df (pd.DataFrame): The trials.
+    by (list): The columns that identify a session.
+    reset_at_block (bool): If True, the last four average does not look back past the start of a block.
+    Returns:
+    pd.DataFrame: A copy of the trials with the derived columns replaced.
+    """
+
+    scores = score(results_df['number_shown'].to_numpy(), results_df['response_time'].to_numpy(dtype=np.float64, na_value=np.nan),
+                   results_df['number_to_omit'].to_numpy(), session_starts(results_df, by, reset_at_block))
+    return results_df.assign(**scores)
+
+
+def verify(results_df:pd.DataFrame, by:list=['source_file', 'participant_number'], reset_at_block:bool=False,
+           tolerance:float=1e-9) -> pd.DataFrame:
+    """
+    Recalculates the derived columns and compares them with the stored values.
+    Parameters:
+    results_df (pd.DataFrame): The trials, as read from the output files.
+    by (list): The columns that identify a session.
+    reset_at_block (bool): If True, the last four average does not look back past the start of a block.
+    tolerance (float): The largest difference in last_four_avg (in seconds) that is not reported.
+    Returns:
+    pd.DataFrame: One row per differing value, with the session columns, block, trial, column, stored and recalculated values.
+    """
+
+    rescored = rescore(results_df, by, reset_at_block)
+    id_columns = [col for col in by + ['block', 'trial'] if col in results_df.columns]
+    stored_correct = results_df['response_correct'].astype(bool).to_numpy()
+    stored_avg = results_df['last_four_avg'].to_numpy(dtype=np.float64, na_value=np.nan)
+    new_avg = rescored['last_four_avg'].to_numpy()
+    differs = {
+        'response_correct': stored_correct != rescored['response_correct'].to_numpy(),
+        'last_four_avg': ~(np.isclose(stored_avg, new_avg, rtol=0, atol=tolerance) | (np.isnan(stored_avg) & np.isnan(new_avg))),
+    }
+    frames = []
+    for col, mask in differs.items():
+        if mask.any():
+            frames.append(results_df.loc[mask, id_columns].assign(column=col, stored=results_df.loc[mask, col].to_numpy(),
+                                                                   recalculated=rescored.loc[mask, col].to_numpy()))
+    if len(frames) == 0:
+        return pd.DataFrame(columns=id_columns + ['column', 'stored', 'recalculated'])
+    return pd.concat(frames).sort_index(kind='stable').reset_index(drop=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recalculate the derived columns of SART output files, or check the stored values.")
+    parser.add_argument('archive', help="Folder containing the SART output files (searched recursively).")
+    parser.add_argument('--pattern', default="SART_*.xlsx", help="File name pattern to match (default: SART_*.xlsx).")
+    parser.add_argument('--verify', action='store_true',
+                        help="Report trials where the stored values differ from the recalculated ones (exit code 1 if any do).")
+    parser.add_argument('--reset-at-block', action='store_true', help="Do not look back past the start of a block for the last four average.")
+    parser.add_argument('--processes', type=int, default=None, help="Number of worker processes for reading (default: one per CPU).")
+    parser.add_argument('--output', default=None,
+                        help="Output file (.csv or .xlsx). Defaults to sart_rescored.csv, or sart_discrepancies.csv with --verify.")
+    args = parser.parse_args()
+
+    paths = find_files(args.archive, args.pattern)
+    if len(paths) == 0:
+        parser.error(f"No files matching {args.pattern} found in {args.archive}")
+
+    results_df, _ = read_archive(paths, processes=args.processes)
+    start_time = time.perf_counter()
+    if args.verify:
+        output = args.output or "sart_discrepancies.csv"
+        discrepancies = verify(results_df, reset_at_block=args.reset_at_block)
+        print(f"Checked {len(results_df)} trials from {len(paths)} files in {time.perf_counter() - start_time:.2f}s")
+        if len(discrepancies) == 0:
+            print("No discrepancies found.")
+            return
+        for col, count in discrepancies['column'].value_counts().items():
+            print(f"  {col}: {count} trials differ")
+        print(f"  in {discrepancies['source_file'].nunique()} files")
+        write_table(discrepancies, output)
+        print(f"Discrepancies saved to {output}")
+        sys.exit(1)
+    else:
+        output = args.output or "sart_rescored.csv"
+        rescored = rescore(results_df, reset_at_block=args.reset_at_block)
+        print(f"Rescored {len(results_df)} trials from {len(paths)} files in {time.perf_counter() - start_time:.2f}s")
+        write_table(rescored, output)
+        print(f"Rescored trials saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
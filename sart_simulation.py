@@ -0,0 +1,230 @@
+"""
+Headless simulation of SART sessions, for power analysis and for testing analysis pipelines.
+
+Simulated sessions use the same trial schedule generation (SessionPlan) and scoring
+(SART.score_response and SART.record_trial) as a real session, but no window is opened
+and time is virtual: instead of waiting for stimuli to be shown, the clock is simply
+advanced. Responses come from a SimulatedParticipant with configurable response time
+distribution, error probabilities and fatigue drift.
+
+The results have the same columns as the file written by SART.save_and_quit(), with one
+simulated participant per session (participant_number is the session number).
+
+Example (10,000 sessions of 1 block of 5 reps, written to a CSV file):
+
+    python sart_simulation.py --sessions 10000 --blocks 1 --reps 5 --output simulated.csv
+
+Or from Python:
+
+    from sart_simulation import SimulatedParticipant, simulate_sessions
+
+    participant = SimulatedParticipant(commission_prob=0.3, fatigue_rt_drift=0.002)
+    results = simulate_sessions(1000, participant, blocks=2, reps=5, seed=1)
+"""
+
+import argparse
+import concurrent.futures
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import python_sart
+
+
+class SimulatedParticipant:
+    def __init__(self, rt_mu:float=0.35, rt_sigma:float=0.05, rt_tau:float=0.08,
+                 commission_prob:float=0.4, omission_prob:float=0.02,
+                 fatigue_rt_drift:float=0.0, fatigue_error_drift:float=0.0) -> None:
+        """
+        Describes how a simulated participant responds.
+        Response times are drawn from an ex-Gaussian distribution (a normal plus an exponential component).
+        Parameters:
+        rt_mu (float): The mean of the normal component of the response time, in seconds.
+        rt_sigma (float): The standard deviation of the normal component, in seconds.
+        rt_tau (float): The mean of the exponential component, in seconds.
+        commission_prob (float): The probability of pressing on a trial showing the number to omit.
+        omission_prob (float): The probability of not pressing on any other trial.
+        fatigue_rt_drift (float): Seconds added to rt_mu per minute of time on task.
+        fatigue_error_drift (float): Relative increase of both error probabilities per minute of time on task
+                                     (e.g. 0.05 makes errors 5% more likely each minute).
+        """
+
+        self.rt_mu = rt_mu
+        self.rt_sigma = rt_sigma
+        self.rt_tau = rt_tau
+        self.commission_prob = commission_prob
+        self.omission_prob = omission_prob
+        self.fatigue_rt_drift = fatigue_rt_drift
+        self.fatigue_error_drift = fatigue_error_drift
+
+    def respond(self, rng:np.random.Generator, should_press:bool, minutes_on_task:float) -> float|None:
+        """
+        Simulates the response to one trial.
+        Parameters:
+        rng (np.random.Generator): The random number generator to use.
+        should_press (bool): Whether the trial requires a press (i.e. it does not show the number to omit).
+        minutes_on_task (float): The time spent on trials so far, used for the fatigue drift.
+        Returns:
+        float|None: The response time in seconds, or None if the participant did not press.
+        """
+
+        error_scale = 1 + self.fatigue_error_drift * minutes_on_task
+        if should_press:
+            presses = rng.random() >= min(1.0, self.omission_prob * error_scale)
+        else:
+            presses = rng.random() < min(1.0, self.commission_prob * error_scale)
+        if not presses:
+            return None
+        mu = self.rt_mu + self.fatigue_rt_drift * minutes_on_task
+        return max(0.0, rng.normal(mu, self.rt_sigma) + rng.exponential(self.rt_tau))
+
+
+class SimulatedSART(python_sart.SART):
+    def __init__(self, simulated_participant:SimulatedParticipant, participant_number:int, seed:int, **kwargs) -> None:
+        """
+        A SART session run by a simulated participant, without a window and using virtual time.
+        Parameters:
+        simulated_participant (SimulatedParticipant): How the participant responds.
+        participant_number (int): The participant number recorded in the results.
+        seed (int): The seed for the trial schedule, the number to omit (if not given) and the responses.
+        **kwargs: Any other SART parameters (e.g. blocks, reps, omit_number, fixed_order).
+        """
+
+        self.rng = np.random.default_rng(seed)
+        if kwargs.get('omit_number') is None:
+            kwargs['omit_number'] = int(self.rng.integers(1, 10))
+        kwargs['show_countdown'] = False
+        super().__init__(seed=seed, **kwargs)
+        self.participant = python_sart.Participant(number=participant_number, gender="Simulated", age=None,
+                                                   year_of_study="N/A", normal_vision="Yes", researcher_initials="")
+        self.simulated_participant = simulated_participant
+        self.virtual_time = 0.0
+        self.time_on_task = 0.0
+
+    def run(self) -> pd.DataFrame:
+        """
+        Runs the practice block (if enabled) and every block of the session.
+        Returns:
+        pd.DataFrame: The results, in the same layout as the file written by save_and_quit().
+        """
+
+        if self.show_practice:
+            self.block(practice=True)
+        for block_n in range(self.blocks):
+            if block_n > 0:
+                self.virtual_time += self.break_between_blocks_secs + self.countdown_secs
+            self.block(block_number=block_n+1)
+        return self.build_results_dataframe()
+
+    def block(self, block_number:int=0, practice:bool=False) -> None:
+        trials = self.plan.practice if practice else self.plan.blocks[block_number-1]
+        for trial_number, trial in enumerate(trials):
+            self.trial(trial, trial_number=trial_number+1, block_number=block_number, practice=practice)
+
+    def trial(self, parameters:dict, trial_number:int, block_number:int, practice:bool=False) -> None:
+        number = parameters['number']
+        response_window = self.stimulus_visible_secs + self.stimulus_masked_secs
+        response_time = self.simulated_participant.respond(self.rng, number != self.omit_number, self.time_on_task / 60)
+        keys_pressed = []
+        if response_time is not None and response_time < response_window:
+            keys_pressed = [('space', response_time)]
+
+        trial_secs = response_window + (self.stimulus_masked_secs if practice else 0)
+        self.virtual_time += trial_secs
+        self.time_on_task += trial_secs
+
+        response_time, correct_response = self.score_response(number, keys_pressed)
+        if not practice:
+            self.record_trial(block_number, trial_number, number, response_time, correct_response)
+
+
+def simulate_session(simulated_participant:SimulatedParticipant, participant_number:int, seed:int, **kwargs) -> pd.DataFrame:
+    """
+    Simulates a single session.
+    Parameters:
+    simulated_participant (SimulatedParticipant): How the participant responds.
+    participant_number (int): The participant number recorded in the results.
+    seed (int): The seed for the session.
+    **kwargs: Any other SART parameters.
+    Returns:
+    pd.DataFrame: The results of the session.
+    """
+
+    return SimulatedSART(simulated_participant, participant_number, seed, **kwargs).run()
+
+
+def _simulate_chunk(simulated_participant:SimulatedParticipant, first_session:int, n_sessions:int, seed:int, kwargs:dict) -> pd.DataFrame:
+    frames = []
+    for participant_number in range(first_session, first_session + n_sessions):
+        session_seed = int(np.random.SeedSequence([seed, participant_number]).generate_state(1)[0])
+        frames.append(simulate_session(simulated_participant, participant_number, session_seed, **kwargs))
+    return pd.concat(frames, ignore_index=True)
+
+
+def simulate_sessions(n_sessions:int, simulated_participant:SimulatedParticipant, seed:int=0,
+                      processes:int|None=None, chunk_size:int=200, **kwargs) -> pd.DataFrame:
+    """
+    Simulates many sessions, spread over a pool of processes.
+    The results only depend on the seed and the parameters, not on the number of processes.
+    Parameters:
+    n_sessions (int): The number of sessions to simulate. Sessions are numbered from 1.
+    simulated_participant (SimulatedParticipant): How the participants respond.
+    seed (int): The seed for the whole simulation.
+    processes (int|None): The number of worker processes. If None, one per CPU. If 1, no pool is used.
+    chunk_size (int): The number of sessions given to a worker at a time.
+    **kwargs: Any other SART parameters (e.g. blocks, reps, omit_number, fixed_order).
+    Returns:
+    pd.DataFrame: The results of every session, one row per trial.
+    """
+
+    kwargs.setdefault('show_practice', False)
+    chunks = [(first, min(chunk_size, n_sessions - first + 1)) for first in range(1, n_sessions + 1, chunk_size)]
+    if processes == 1:
+        frames = [_simulate_chunk(simulated_participant, first, n, seed, kwargs) for first, n in chunks]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = [pool.submit(_simulate_chunk, simulated_participant, first, n, seed, kwargs) for first, n in chunks]
+            frames = [future.result() for future in futures]
+    return pd.concat(frames, ignore_index=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Simulate SART sessions without a window.")
+    parser.add_argument('--sessions', type=int, default=1000, help="Number of sessions to simulate.")
+    parser.add_argument('--blocks', type=int, default=1, help="Number of blocks per session.")
+    parser.add_argument('--reps', type=int, default=5, help="Number of reps per block.")
+    parser.add_argument('--omit-number', type=int, default=None, help="The number to omit. Random per session if not given.")
+    parser.add_argument('--fixed-order', action='store_true', help="Show the numbers in a fixed sequence.")
+    parser.add_argument('--rt-mu', type=float, default=0.35)
+    parser.add_argument('--rt-sigma', type=float, default=0.05)
+    parser.add_argument('--rt-tau', type=float, default=0.08)
+    parser.add_argument('--commission-prob', type=float, default=0.4)
+    parser.add_argument('--omission-prob', type=float, default=0.02)
+    parser.add_argument('--fatigue-rt-drift', type=float, default=0.0, help="Seconds added to the mean RT per minute on task.")
+    parser.add_argument('--fatigue-error-drift', type=float, default=0.0, help="Relative increase in error probabilities per minute on task.")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--processes', type=int, default=None, help="Number of worker processes (default: one per CPU).")
+    parser.add_argument('--output', default="simulated_sart.csv", help="Output file (.csv, .xlsx, .parquet or .feather).")
+    args = parser.parse_args()
+    try:
+        python_sart.check_output_format(python_sart.output_format_for_path(args.output))
+    except (ValueError, ImportError) as e:
+        parser.error(str(e))
+
+    participant = SimulatedParticipant(rt_mu=args.rt_mu, rt_sigma=args.rt_sigma, rt_tau=args.rt_tau,
+                                       commission_prob=args.commission_prob, omission_prob=args.omission_prob,
+                                       fatigue_rt_drift=args.fatigue_rt_drift, fatigue_error_drift=args.fatigue_error_drift)
+    start_time = time.perf_counter()
+    results_df = simulate_sessions(args.sessions, participant, seed=args.seed, processes=args.processes,
+                                   blocks=args.blocks, reps=args.reps, omit_number=args.omit_number, fixed_order=args.fixed_order)
+    elapsed = time.perf_counter() - start_time
+    print(f"Simulated {args.sessions} sessions ({len(results_df)} trials) in {elapsed:.2f}s "
+          f"({args.sessions/elapsed:.0f} sessions/s, {os.cpu_count()} CPUs)")
+    python_sart.write_results(results_df, args.output)
+    print(f"Data saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
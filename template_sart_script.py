@@ -41,4 +41,10 @@ fixed_order = False
 
 # Run the experiment
 sart = python_sart.SART(blocks=blocks, reps=reps, omit_number=number_to_omit, show_practice=practice, fixed_order=fixed_order, show_countdown=show_countdown)
-sart.run()
\ No newline at end of file
+sart.run()
+
+# To run several participants one after the other without restarting PsychoPy,
+# replace the two lines above with:
+# orchestrator = python_sart.SessionOrchestrator([dict(blocks=blocks, reps=reps, omit_number=number_to_omit, show_practice=practice,
+#                                                      fixed_order=fixed_order, show_countdown=show_countdown)], loop=True)
+# orchestrator.run()
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Checks that the analysis tools read an output folder written by SART.save_and_quit(), including the
+files saved next to each output file. Runs without PsychoPy: the sessions are simulated with
+sart_simulation.py and saved without a window.
+"""
+
+import pathlib
+
+import pytest
+
+import python_sart
+import sart_analysis
+import sart_archive
+import sart_rescore
+import sart_simulation
+
+
+def save_session(folder:pathlib.Path, participant_number:int, output_format:str) -> pathlib.Path:
+    """
+    Simulates a session with a trial log, saves it with save_and_quit(), and returns the output file.
+    """
+
+    sart = sart_simulation.SimulatedSART(sart_simulation.SimulatedParticipant(), participant_number, seed=participant_number,
+                                         blocks=2, reps=1, show_practice=False, output_format=output_format)
+    sart.output_file = folder / f"SART_{participant_number}{python_sart.OUTPUT_FORMATS[output_format]['suffix']}"
+    sart.plan.save(sart.get_plan_file_path())
+    sart.open_trial_log()
+    sart.run()
+    sart.owns_window = False
+    with pytest.raises(python_sart.SessionEnded):
+        sart.save_and_quit()
+    assert len(sart.results_df) == len(sart.results)
+    return sart.output_file
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'xlsx'])
+def test_analysis_reads_saved_folder(tmp_path, output_format):
+    output_files = [save_session(tmp_path, participant_number, output_format) for participant_number in [1, 2]]
+    suffix = python_sart.OUTPUT_FORMATS[output_format]['suffix']
+    assert (tmp_path / "SART_1.log.csv").exists()
+    assert (tmp_path / f"events_SART_1{suffix}").exists()
+
+    paths = sart_analysis.find_files(tmp_path, f"SART_*{suffix}")
+    assert paths == output_files
+    results_df, _ = sart_analysis.read_archive(paths, processes=1)
+    assert len(results_df) == 2 * 2 * 45
+    summary = sart_analysis.compute_metrics(results_df)
+    assert len(summary) == 4
+    assert len(sart_rescore.verify(results_df)) == 0
+    archive = sart_archive.Archive(tmp_path / "archive")
+    ingested = archive.ingest(paths, "study", date="2026-01-01", processes=1)
+    assert sorted(ingested['participant']) == ['1', '2']
+    assert len(archive.query()) == 2 * 2 * 45
+
+
+def test_is_results_file():
+    assert python_sart.is_results_file("SART_12.csv")
+    assert python_sart.is_results_file("output/SART_12.xlsx")
+    for name in ["SART_12.log.csv", "SART_12.log.interrupted.csv", "SART_12.session.json", "SART_12.events.npz"]:
+        assert not python_sart.is_results_file(name)
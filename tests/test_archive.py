@@ -0,0 +1,66 @@
+"""
+Checks how sart_archive.Archive partitions sessions, replaces re-ingested ones, and queries sessions that do not
+all have the same columns.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import python_sart
+import sart_archive
+
+
+def write_session(path, participant_number:int=12, n_trials:int=4, drop:list=[]) -> None:
+    results_df = pd.DataFrame({
+        'participant_number': participant_number, 'gender': "F", 'age': 20, 'year_of_study': "2", 'normal_vision': "Yes",
+        'researcher_initials': "AB", 'experiment_completed': True, 'block': 1, 'trial': np.arange(1, n_trials + 1),
+        'number_to_omit': 3, 'number_shown': [3, 1, 2, 4][:n_trials], 'response_correct': True, 'response_time': 0.4,
+        'last_four_avg': np.nan})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    python_sart.write_results(results_df.drop(columns=drop), path)
+
+
+def test_two_sessions_of_a_participant_on_one_day(tmp_path):
+    write_session(tmp_path / "SART_12.csv")
+    write_session(tmp_path / "SART_12_retest.csv")
+    archive = sart_archive.Archive(tmp_path / "archive")
+    ingested = archive.ingest([tmp_path / "SART_12.csv", tmp_path / "SART_12_retest.csv"], "pilot", date="2026-01-01", processes=1)
+    assert len(set(ingested['path'])) == 2
+    trials = archive.query(participant="12")
+    assert len(trials) == 8
+    assert sorted(set(trials['session'])) == ['SART_12', 'SART_12_retest']
+
+
+def test_reingest_replaces_the_partition(tmp_path):
+    write_session(tmp_path / "SART_12.csv")
+    archive = sart_archive.Archive(tmp_path / "archive")
+    archive.ingest([tmp_path / "SART_12.csv"], "pilot", date="2026-01-01", processes=1)
+    write_session(tmp_path / "SART_12.csv", n_trials=3, drop=['last_four_avg'])
+    ingested = archive.ingest([tmp_path / "SART_12.csv"], "pilot", date="2026-01-01", processes=1)
+    folder = archive.root / ingested['path'].iloc[0]
+    assert not (folder / "last_four_avg.npy").exists()
+    assert len(archive.sessions()) == 1
+    assert len(archive.query()) == 3
+
+
+def test_same_partition_from_another_file_is_refused(tmp_path):
+    write_session(tmp_path / "lab1" / "SART_12.csv")
+    write_session(tmp_path / "lab2" / "SART_12.csv")
+    archive = sart_archive.Archive(tmp_path / "archive")
+    archive.ingest([tmp_path / "lab1" / "SART_12.csv"], "pilot", date="2026-01-01", processes=1)
+    with pytest.raises(FileExistsError):
+        archive.ingest([tmp_path / "lab2" / "SART_12.csv"], "pilot", date="2026-01-01", processes=1)
+    assert archive.query()['number_shown'].tolist() == [3, 1, 2, 4]
+
+
+def test_query_missing_column(tmp_path):
+    write_session(tmp_path / "SART_1.csv", participant_number=1)
+    write_session(tmp_path / "SART_2.csv", participant_number=2, drop=['last_four_avg', 'block'])
+    archive = sart_archive.Archive(tmp_path / "archive")
+    archive.ingest([tmp_path / "SART_1.csv", tmp_path / "SART_2.csv"], "pilot", date="2026-01-01", processes=1)
+    trials = archive.query(['number_shown', 'block'])
+    assert len(trials) == 8
+    assert trials['block'].isna().sum() == 4
+    with pytest.raises(KeyError, match="participant=2"):
+        archive.query(block=1)
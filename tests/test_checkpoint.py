@@ -0,0 +1,61 @@
+"""
+Checks that an interrupted session can be resumed from its checkpoint, more than once.
+"""
+
+import pytest
+
+import python_sart
+import sart_simulation
+
+
+def interrupted_session(folder, **kwargs) -> sart_simulation.SimulatedSART:
+    """
+    Simulates the first of two blocks of a session, writing the trial log and a checkpoint as run() does.
+    """
+
+    sart = sart_simulation.SimulatedSART(sart_simulation.SimulatedParticipant(), 12, seed=1, blocks=2, reps=1,
+                                         show_practice=False, output_format='csv', **kwargs)
+    sart.output_file = folder / "SART_12.csv"
+    sart.plan.save(sart.get_plan_file_path())
+    sart.open_trial_log()
+    sart.block(block_number=1)
+    sart.completed_blocks = 1
+    sart.write_checkpoint()
+    sart.writer.close()
+    return sart
+
+
+def test_resume_restores_settings(tmp_path):
+    sart = interrupted_session(tmp_path, record_timing=True, output_layout='normalized')
+    resumed = python_sart.SART(output_format='csv')
+    resumed.load_checkpoint(sart.get_checkpoint_file_path())
+    assert resumed.record_timing
+    assert resumed.output_layout == 'normalized'
+    assert resumed.columns == sart.columns
+    assert len(resumed.results) == 45
+    resumed.writer.close()
+
+
+def test_resuming_twice_keeps_every_interrupted_log(tmp_path):
+    sart = interrupted_session(tmp_path)
+    first = python_sart.SART(output_format='csv')
+    first.load_checkpoint(sart.get_checkpoint_file_path())
+    first.write_checkpoint()
+    first.writer.close()
+    second = python_sart.SART(output_format='csv')
+    second.load_checkpoint(sart.get_checkpoint_file_path())
+    second.writer.close()
+    assert second.attempt == 2
+    assert (tmp_path / "SART_12.log.1.interrupted.csv").exists()
+    assert (tmp_path / "SART_12.log.2.interrupted.csv").exists()
+    assert len(second.results) == 45
+
+
+def test_resume_rebuilds_live_stats(tmp_path):
+    sart = interrupted_session(tmp_path)
+    resumed = python_sart.SART(output_format='csv', omit_number=sart.omit_number % 9 + 1)
+    resumed.load_checkpoint(sart.get_checkpoint_file_path())
+    resumed.writer.close()
+    assert resumed.live_stats() == resumed.live_stats(1)
+    #The response times are read back from the trial log, so they can differ in the last digit
+    assert resumed.live_stats() == pytest.approx(sart.live_stats(1))
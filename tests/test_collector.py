@@ -0,0 +1,169 @@
+"""
+Checks the collector client (python_sart.CollectorClient) against a local collector service (sart_collector.Collector):
+sending, retrying, falling back to the local file, and uploading the file later.
+"""
+
+import asyncio
+import csv
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+import python_sart
+import sart_collector
+
+COLUMNS = ['block', 'trial', 'number_shown', 'response_correct', 'response_time', 'last_four_avg']
+
+
+class LocalCollector:
+    """
+    Runs a collector service on localhost in a background thread.
+    """
+
+    def __init__(self, store, port:int=0) -> None:
+        self.collector = sart_collector.Collector(store)
+        self._started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, args=(port,), daemon=True)
+        self._thread.start()
+        assert self._started.wait(5)
+
+    def _run(self, port:int) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._server = self._loop.run_until_complete(asyncio.start_server(self.collector.handle_connection, '127.0.0.1', port))
+        self.address = f"127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+        self._started.set()
+        self._loop.run_forever()
+
+    def trials(self) -> list[dict]:
+        with open(self.collector.trials_path, 'r', newline='', encoding='utf-8') as trials_file:
+            return list(csv.DictReader(trials_file))
+
+    async def _shutdown(self) -> None:
+        self._server.close()
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+        self._loop.close()
+        self.collector.close()
+
+
+@pytest.fixture
+def collector(tmp_path):
+    local_collector = LocalCollector(tmp_path / "store")
+    yield local_collector
+    local_collector.stop()
+
+
+def free_port() -> int:
+    with socket.socket() as free_socket:
+        free_socket.bind(('127.0.0.1', 0))
+        return free_socket.getsockname()[1]
+
+
+def rows(n_trials:int, block:int=1) -> list[list]:
+    return [[block, trial, 3, True, 0.35, None] for trial in range(1, n_trials + 1)]
+
+
+def client(address:str, fallback_path, session:str="lab1-SART_1-1-0", **kwargs) -> python_sart.CollectorClient:
+    return python_sart.CollectorClient(address, "lab1", session, COLUMNS, {'participant_number': 1}, fallback_path, **kwargs)
+
+
+def test_send(collector, tmp_path):
+    collector_client = client(collector.address, tmp_path / "SART_1.collector.jsonl")
+    for row in rows(5):
+        collector_client.put(row)
+    assert collector_client.close()
+    assert collector_client.stats()['rows_sent'] == 5
+    assert [trial['trial'] for trial in collector.trials()] == ['1', '2', '3', '4', '5']
+    assert not (tmp_path / "SART_1.collector.jsonl").exists()
+
+
+def test_send_with_full_queue(collector, tmp_path):
+    collector_client = client(collector.address, tmp_path / "SART_1.collector.jsonl", max_queue_size=2, batch_size=3)
+    for row in rows(20):
+        collector_client.put(row)
+    assert collector_client.close()
+    assert collector_client.stats()['rows_sent'] == 20
+    assert sorted(int(trial['trial']) for trial in collector.trials()) == list(range(1, 21))
+
+
+def test_retry_until_collector_starts(tmp_path):
+    port = free_port()
+    collector_client = client(f"127.0.0.1:{port}", tmp_path / "SART_1.collector.jsonl", retries=5, retry_delay=0.1)
+    for row in rows(3):
+        collector_client.put(row)
+    time.sleep(0.2)
+    local_collector = LocalCollector(tmp_path / "store", port=port)
+    try:
+        assert collector_client.close()
+        stats = collector_client.stats()
+        assert stats['retries'] > 0
+        assert stats['rows_sent'] == 3
+        assert len(local_collector.trials()) == 3
+    finally:
+        local_collector.stop()
+
+
+def test_spool_and_upload(collector, tmp_path):
+    fallback_path = tmp_path / "SART_1.collector.jsonl"
+    collector_client = client(f"127.0.0.1:{free_port()}", fallback_path, retries=1, retry_delay=0.01)
+    for row in rows(4):
+        collector_client.put(row)
+    assert collector_client.close()
+    assert collector_client.stats()['rows_spooled'] == 4
+    assert sart_collector.upload(fallback_path, collector.address) == 4
+    #Sending the file again stores nothing new
+    assert sart_collector.upload(fallback_path, collector.address) == 0
+    assert len(collector.trials()) == 4
+
+
+def test_close_spools_when_time_runs_out(collector, tmp_path):
+    #A server that accepts connections but never replies, so every request waits for the timeout
+    with socket.socket() as silent_server:
+        silent_server.bind(('127.0.0.1', 0))
+        silent_server.listen()
+        fallback_path = tmp_path / "SART_1.collector.jsonl"
+        collector_client = client(f"127.0.0.1:{silent_server.getsockname()[1]}", fallback_path, timeout=1.0, retries=3, retry_delay=0.5)
+        for row in rows(6):
+            collector_client.put(row)
+        start_time = time.perf_counter()
+        assert not collector_client.close(timeout=0.5)
+        assert time.perf_counter() - start_time < 1.5
+        assert collector_client.stats()['rows_spooled'] == 6
+        #The sending thread stops once close() has spooled its batch, so no row is written twice
+        time.sleep(0.2)
+        messages = [json.loads(line) for line in fallback_path.read_text(encoding='utf-8').splitlines()]
+        assert sum(len(message['rows']) for message in messages if message['type'] == 'rows') == 6
+    assert sart_collector.upload(fallback_path, collector.address) == 6
+
+
+def test_resumed_session_reruns_block(collector, tmp_path):
+    first_attempt = client(collector.address, tmp_path / "SART_1.collector.jsonl", session="lab1-SART_1-1-0")
+    for row in rows(3, block=2):
+        first_attempt.put(row)
+    assert first_attempt.close()
+    resumed = client(collector.address, tmp_path / "SART_1.collector.jsonl", session="lab1-SART_1-1-1")
+    for row in rows(5, block=2):
+        resumed.put(row)
+    assert resumed.close()
+    stored = [trial for trial in collector.trials() if trial['session'] == "lab1-SART_1-1-1"]
+    assert [trial['trial'] for trial in stored] == ['1', '2', '3', '4', '5']
+
+
+def test_collector_session_includes_attempt(tmp_path):
+    sart = python_sart.SART(output_format='csv', station="lab1", seed=7)
+    sart.output_file = tmp_path / "SART_1.csv"
+    assert sart.get_collector_session() == "lab1-SART_1-7-0"
+    sart.attempt = 1
+    assert sart.get_collector_session() == "lab1-SART_1-7-1"
@@ -0,0 +1,57 @@
+"""
+Checks what SessionOrchestrator hands on from one session to the next. The sessions are not run:
+SART.run() is replaced by a stand-in that records the state it was given, so no window is needed.
+"""
+
+import time
+
+import python_sart
+
+
+class FakeCore:
+    getTime = staticmethod(time.perf_counter)
+
+    @staticmethod
+    def quit():
+        pass
+
+
+class FakeResponses:
+    def __init__(self, name:str) -> None:
+        self.name = name
+
+
+def run_sessions(monkeypatch, sessions:list[dict]) -> list[dict]:
+    seen = []
+
+    def fake_run(sart):
+        seen.append({'responses': sart.responses, 'stimuli': sart.stimuli,
+                     'cache_stats': None if sart.stimuli is None else sart.stimuli.stats()})
+        if sart.responses is None:
+            sart.responses = FakeResponses(sart.response_backend)
+        if sart.stimuli is None:
+            sart.stimuli = python_sart.StimulusCache(window=None)
+        sart.stimuli.hits += 10
+        sart.stimuli.misses += 1
+        sart.participant = python_sart.Participant(str(len(seen)), "", 20, "", "", "")
+        sart.run_timing = {'dialog_secs': 0.0, 'setup_secs': 0.0}
+        raise python_sart.SessionEnded()
+
+    monkeypatch.setattr(python_sart, 'core', FakeCore)
+    monkeypatch.setattr(python_sart.SART, 'run', fake_run)
+    python_sart.SessionOrchestrator(sessions).run()
+    return seen
+
+
+def test_response_backend_only_reused_for_same_kind(monkeypatch):
+    seen = run_sessions(monkeypatch, [{'response_backend': 'event'}, {'response_backend': 'event'}, {'response_backend': 'keyboard'}])
+    assert seen[0]['responses'] is None
+    assert seen[1]['responses'].name == 'event'
+    assert seen[2]['responses'] is None
+
+
+def test_stimulus_cache_stats_reset_per_session(monkeypatch):
+    seen = run_sessions(monkeypatch, [{}, {}])
+    assert seen[1]['stimuli'] is not None
+    assert seen[1]['cache_stats']['hits'] == 0
+    assert seen[1]['cache_stats']['misses'] == 0
@@ -0,0 +1,34 @@
+"""
+Checks that rush mode only holds back the garbage collector within a trial.
+"""
+
+import gc
+import weakref
+
+import python_sart
+
+
+class Node:
+    pass
+
+
+def make_cycle() -> weakref.ref:
+    node = Node()
+    node.self = node
+    return weakref.ref(node)
+
+
+def test_garbage_collected_between_trials():
+    rush = python_sart.RushMode(raise_priority=False)
+    rush.enter()
+    try:
+        assert not gc.isenabled()
+        cycle = make_cycle()
+        assert cycle() is not None
+        rush.between_trials()
+        assert cycle() is None
+        assert rush.stats['trial_collections'] == 1
+    finally:
+        rush.exit()
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == 0
@@ -0,0 +1,49 @@
+"""
+Checks the streaming trial log and the background writer that appends to it.
+"""
+
+import time
+
+import python_sart
+
+
+def wait_for(condition, timeout:float=5.0) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_writer_honours_flush_every(tmp_path):
+    path = tmp_path / "SART_1.log.csv"
+    writer = python_sart.BackgroundWriter(python_sart.TrialLog(path, ['block', 'trial'], flush_every=3))
+    writer.put([1, 1])
+    writer.put([1, 2])
+    assert wait_for(lambda: writer.rows_written == 2)
+    assert path.read_text().splitlines() == ['block,trial']
+    writer.put([1, 3])
+    assert wait_for(lambda: writer.rows_written == 3)
+    assert path.read_text().splitlines() == ['block,trial', '1,1', '1,2', '1,3']
+    assert writer.close()
+
+
+def test_writer_survives_write_errors(tmp_path):
+    trial_log = python_sart.TrialLog(tmp_path / "SART_1.log.csv", ['block', 'trial'])
+
+    def fail(row):
+        raise OSError("No space left on device")
+
+    trial_log.append = fail
+    writer = python_sart.BackgroundWriter(trial_log, max_queue_size=2)
+    start_time = time.perf_counter()
+    for trial in range(50):
+        writer.put([1, trial])
+    writer.sync()
+    assert time.perf_counter() - start_time < 2.0
+    assert not writer.close(timeout=2.0)
+    stats = writer.stats()
+    assert stats['rows_written'] == 0
+    assert stats['rows_dropped'] == 50
+    assert "No space left" in stats['error']